@@ -42,10 +42,12 @@ INSTALLED_APPS = [
     "users",
 ]
 
+# Api requests authenticate once with their bearer token, before the
+# session is read, see users.middleware
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "oauth2_provider.middleware.OAuth2TokenMiddleware",
+    "users.middleware.ApiAuthenticationMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -107,6 +109,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = ["users.backends.HashingModelBackend"]
+
+PASSWORD_HASHING = {
+    "EXECUTOR": os.environ.get("PASSWORD_HASHING_EXECUTOR", "sync"),
+    "WORKERS": int(os.environ.get("PASSWORD_HASHING_WORKERS", 0)) or None,
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
@@ -132,7 +141,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
+        "users.authentication.CachedOAuth2Authentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -142,3 +151,24 @@ REST_FRAMEWORK = {
 OAUTH2_PROVIDER = {"SCOPES": {"read": "Read scope", "write": "Write scope"}}
 
 AUTH_USER_MODEL = "users.User"
+
+SUBSCRIPTION_SERVICE = {
+    "MOCK": int(os.environ.get("SUBSCRIPTION_MOCK", 1)),
+    "BASE_API_URL": os.environ.get(
+        "SUBSCRIPTION_API_URL",
+        "https://subscriptions.fake.service.test/api/v1/",
+    ),
+    "POOL_MAXSIZE": int(os.environ.get("SUBSCRIPTION_POOL_MAXSIZE", 10)),
+    "CONNECT_TIMEOUT": float(
+        os.environ.get("SUBSCRIPTION_CONNECT_TIMEOUT", 3.05)
+    ),
+    "READ_TIMEOUT": float(os.environ.get("SUBSCRIPTION_READ_TIMEOUT", 10)),
+    "RETRIES": int(os.environ.get("SUBSCRIPTION_RETRIES", 3)),
+    "CACHE_BACKEND": os.environ.get("SUBSCRIPTION_CACHE_BACKEND", "lru"),
+    "CACHE_TTL": int(os.environ.get("SUBSCRIPTION_CACHE_TTL", 300)),
+    "MODE": os.environ.get("SUBSCRIPTION_MODE", "sync"),
+    "WORKERS": int(os.environ.get("SUBSCRIPTION_WORKERS", 4)),
+    "MAX_CONCURRENT": int(os.environ.get("SUBSCRIPTION_MAX_CONCURRENT", 10)),
+    "FALLBACK": os.environ.get("SUBSCRIPTION_FALLBACK", "fail"),
+    "WEBHOOK_SECRET": os.environ.get("SUBSCRIPTION_WEBHOOK_SECRET", ""),
+}
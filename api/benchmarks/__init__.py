@@ -0,0 +1,37 @@
+"""
+    Benchmarks, run them from the api folder as modules:
+
+        $ poetry run python -m benchmarks.<name> --help
+"""
+import contextlib
+import os
+import tempfile
+
+import django
+
+
+def setup():
+    """Set up django for a standalone benchmark"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+    django.setup()
+
+
+@contextlib.contextmanager
+def scratch_database():
+    """
+    Create a fresh test database, on a temporary sqlite file unless
+    DB_ENGINE points elsewhere, and destroy it on exit
+    """
+    from django.db import connection  # pylint: disable=C0415
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if connection.vendor == "sqlite":
+            name = os.path.join(scratch, "db.sqlite3")
+            connection.settings_dict["TEST"]["NAME"] = name
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,98 @@
+"""
+    Email uniqueness lookup benchmark
+
+    Fills a fresh test database with users, then times the email
+    validation lookup and shows its plan, without and with the
+    lower(email) index:
+
+        $ poetry run python -m benchmarks.email_lookup --rows 1000000
+
+    It runs on sqlite by default, set DB_ENGINE (and the DB_* settings)
+    to measure on PostgreSQL, which needs rights to create the test
+    database.
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks import scratch_database, setup
+
+
+BATCH = 10000
+
+
+def fill(rows):
+    """Insert `rows` users, a fifth of them without email"""
+    from users.models import User  # pylint: disable=C0415
+
+    for start in range(0, rows, BATCH):
+        User.objects.bulk_create(
+            User(
+                id=uuid.uuid4(),
+                username=f"user{number}",
+                email="" if number % 5 == 0 else f"User{number}@Example.com",
+                subscription="active",
+            )
+            for number in range(start, min(start + BATCH, rows))
+        )
+
+
+def measure(label, emails):
+    """Time email_exists over `emails` and print the lookup plan"""
+    from users.serializers import email_exists  # pylint: disable=C0415
+    from users.models import User  # pylint: disable=C0415
+    from django.db.models import Value  # pylint: disable=C0415
+    from django.db.models.functions import Lower  # pylint: disable=C0415
+
+    started = time.perf_counter()
+    for email in emails:
+        email_exists(email, exclude_pk=uuid.uuid4())
+    elapsed = (time.perf_counter() - started) / len(emails)
+
+    plan = (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower=Lower(Value(emails[0])))
+        .exclude(email="")
+        .explain()
+    )
+    print(f"{label}: {elapsed * 1000:10.3f} ms/lookup")
+    print(f"    {plan}")
+
+
+def run(rows, lookups):
+    """Measure the lookup on `rows` users, without and with the index"""
+    from users.models import User  # pylint: disable=C0415
+
+    index = next(
+        index
+        for index in User._meta.indexes  # pylint: disable=E1101,W0212
+        if index.name == "users_user_email_lower_idx"
+    )
+    with scratch_database() as connection:
+        with connection.schema_editor() as editor:
+            editor.remove_index(User, index)
+        started = time.perf_counter()
+        fill(rows)
+        print(f"{rows} users in {time.perf_counter() - started:.1f}s")
+
+        step = max(1, rows // lookups)
+        emails = [f"user{n}@example.COM" for n in range(1, rows, step)]
+        measure("without index", emails)
+        with connection.schema_editor() as editor:
+            editor.add_index(User, index)
+        measure("with index   ", emails)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    run(args.rows, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+    Password hashing benchmark
+
+    Simulates create requests served by the threads of a worker, hashing
+    passwords in the request thread and in the process pool:
+
+        $ poetry run python -m benchmarks.hashing --requests 64 --threads 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup
+
+
+def run(make_password, requests, threads):
+    """Hash `requests` passwords from `threads` threads, return req/s"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(make_password, ["p121212Ab"] * requests))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    setup()
+    from django.test.utils import override_settings  # pylint: disable=C0415
+    from users import hashing  # pylint: disable=C0415
+
+    with override_settings(PASSWORD_HASHING={"EXECUTOR": "sync"}):
+        sync_rate = run(hashing.make_password, args.requests, args.threads)
+
+    process = {"EXECUTOR": "process", "WORKERS": args.workers}
+    with override_settings(PASSWORD_HASHING=process):
+        hashing.make_password("warm up")
+        process_rate = run(hashing.make_password, args.requests, args.threads)
+        started = time.perf_counter()
+        hashing.make_passwords(["p121212Ab"] * args.requests)
+        batch_rate = args.requests / (time.perf_counter() - started)
+        hashing.get_executor().shutdown()
+
+    print(f"cpus: {os.cpu_count()}, pool workers: {args.workers}")
+    print(f"sync:    {sync_rate:8.1f} req/s")
+    print(
+        f"process: {process_rate:8.1f} req/s ({process_rate / sync_rate:.1f}x)"
+    )
+    print(f"batch:   {batch_rate:8.1f} hashes/s")
+
+
+if __name__ == "__main__":
+    main()
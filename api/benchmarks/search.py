@@ -0,0 +1,105 @@
+"""
+    Users search benchmark
+
+    Fills a fresh test database with users, then times searches through
+    the search index against the icontains scan they replace:
+
+        $ poetry run python -m benchmarks.search --rows 5000000
+
+    It runs on sqlite by default, set DB_ENGINE (and the DB_* settings)
+    to measure on PostgreSQL, which needs rights to create the test
+    database.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import scratch_database, setup
+
+
+BATCH = 10000
+NAMES = (
+    "john mary james patricia robert jennifer michael linda william "
+    "elizabeth david barbara richard susan joseph jessica thomas sarah "
+    "charles karen christopher lisa daniel nancy matthew betty anthony"
+).split()
+DOMAINS = ("ine.com", "example.com", "mail.test", "corp.example.org")
+
+
+def fill(rows):
+    """Insert `rows` users with names, usernames and emails"""
+    # pylint: disable=C0415
+    from users.models import User
+    from users.uuids import uuid7
+
+    rand = random.Random(42)
+    for start in range(0, rows, BATCH):
+        users = []
+        for number in range(start, min(start + BATCH, rows)):
+            first, last = rand.choice(NAMES), rand.choice(NAMES)
+            username = f"{first[0]}{last}{number}"
+            users.append(
+                User(
+                    id=uuid7(),
+                    username=username,
+                    first_name=first.title(),
+                    last_name=last.title(),
+                    email=f"{username}@{rand.choice(DOMAINS)}",
+                    subscription="active",
+                )
+            )
+        User.objects.bulk_create(users)
+
+
+def timed(func, queries):
+    """Median and max milliseconds of func over the queries"""
+    times = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), max(times)
+
+
+def measure(rows, limit):
+    """Measure searches on `rows` users"""
+    # pylint: disable=C0415
+    from django.db.models import Q
+    from users.models import User
+    from users.search import SEARCH_FIELDS, search_users
+
+    started = time.perf_counter()
+    fill(rows)
+    print(f"{rows} users in {time.perf_counter() - started:.1f}s")
+
+    queries = ["jsmith12", "patricia", "mail.test", f"{rows // 2}@", "xyzzy"]
+
+    def scan(query):
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__icontains": query})
+        return list(User.objects.filter(condition)[:limit])
+
+    for label, func in (
+        ("icontains scan", scan),
+        ("search index  ", lambda query: search_users(query, limit)),
+    ):
+        median, worst = timed(func, queries)
+        print(f"{label}: median {median:9.1f} ms, max {worst:9.1f} ms")
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    with scratch_database():
+        measure(args.rows, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+    Read serializers benchmark
+
+    Times the per-user cost of the DRF serializers against their
+    compiled fast path, from instances and from values() rows:
+
+        $ poetry run python -m benchmarks.serializers --users 10000
+
+    Users are inserted in a test database, in memory on sqlite, then
+    loaded with their groups prefetched, so only serialization is timed.
+"""
+import argparse
+import time
+
+from benchmarks import scratch_database, setup
+
+
+def build_users(count):
+    """Users with two prefetched groups each, and their rows"""
+    # pylint: disable=C0415
+    from django.contrib.auth.models import Group
+    from users.fieldsets import serializer_fields
+    from users.models import User, UserGroup
+    from users.serializers import UserDetailedSerializer
+
+    groups = Group.objects.bulk_create(
+        [Group(name="sales"), Group(name="support")]
+    )
+    users = User.objects.bulk_create(
+        User(
+            username=f"user{number}",
+            first_name="John",
+            last_name="Doe",
+            email=f"user{number}@ine.com",
+            password="pbkdf2_sha256$600000$salt$hash",
+            subscription="active",
+        )
+        for number in range(count)
+    )
+    UserGroup.objects.bulk_create(
+        UserGroup(user_id=user.id, group_id=group.id)
+        for user in users
+        for group in groups
+    )
+
+    columns = [
+        name
+        for name in serializer_fields(UserDetailedSerializer)
+        if name != "groups"
+    ]
+    users = list(User.objects.prefetch_related("groups").order_by("pk"))
+    rows = []
+    for user in users:
+        row = {name: getattr(user, name) for name in columns}
+        row["groups"] = [group.name for group in user.groups.all()]
+        rows.append(row)
+    return users, rows
+
+
+def per_user(func, users):
+    """Microseconds per user of func over users"""
+    started = time.perf_counter()
+    func(users)
+    return (time.perf_counter() - started) * 1_000_000 / len(users)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup()
+    # pylint: disable=C0415
+    from users.fastpath import CompiledSerializer
+    from users.serializers import UserDetailedSerializer, UserSerializer
+
+    with scratch_database():
+        users, rows = build_users(args.users)
+
+    for serializer_class in (UserSerializer, UserDetailedSerializer):
+        compiled = CompiledSerializer(serializer_class)
+
+        def drf_many(users, serializer_class=serializer_class):
+            return serializer_class(users, many=True).data
+
+        drf = per_user(drf_many, users)
+        fast = per_user(compiled.many, users)
+        fast_rows = per_user(compiled.many, rows)
+        print(f"{serializer_class.__name__}:")
+        print(f"  drf:              {drf:7.2f} us/user")
+        print(f"  compiled:         {fast:7.2f} us/user ({drf / fast:.1f}x)")
+        print(
+            f"  compiled (rows):  {fast_rows:7.2f} us/user "
+            f"({drf / fast_rows:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+    Primary key insert throughput benchmark
+
+    Inserts users with their groups on a fresh test database per key
+    generator, uuid4 and uuid7, reporting the insert rate as the table
+    grows:
+
+        $ poetry run python -m benchmarks.uuid_inserts --rows 500000
+
+    It runs on sqlite by default, set DB_ENGINE (and the DB_* settings)
+    to compare on PostgreSQL, which needs rights to create the test
+    database.
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks import scratch_database, setup
+
+
+WINDOWS = 5
+
+
+def insert(generator, rows, batch):
+    """Insert users and a group each, return the rate of every window"""
+    # pylint: disable=C0415
+    from django.contrib.auth.models import Group
+    from django.db import transaction
+    from users.models import User, UserGroup
+
+    groups = Group.objects.bulk_create(
+        Group(name=f"group{number}") for number in range(10)
+    )
+    window = max(batch, rows // WINDOWS)
+    rates = []
+    started = time.perf_counter()
+    for start in range(0, rows, batch):
+        users = [
+            User(
+                id=generator(),
+                username=f"user{number}",
+                subscription="active",
+            )
+            for number in range(start, min(start + batch, rows))
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            UserGroup.objects.bulk_create(
+                UserGroup(user_id=user.id, group_id=groups[number % 10].id)
+                for number, user in enumerate(users)
+            )
+        inserted = start + len(users)
+        if inserted % window == 0 or inserted == rows:
+            rates.append(window / (time.perf_counter() - started))
+            started = time.perf_counter()
+    return rates
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection  # pylint: disable=C0415
+    from users.uuids import uuid7  # pylint: disable=C0415
+
+    print(f"{connection.vendor}, {args.rows} users in batches of {args.batch}")
+    print("rows/s per fifth of the inserts")
+    for name, generator in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        with scratch_database():
+            rates = insert(generator, args.rows, args.batch)
+        print(f"{name}: " + " ".join(f"{rate:9.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+    Api authentication module
+"""
+import copy
+import hashlib
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+
+from .cache import build_cache
+from .conf import token_cache_settings
+
+
+def bearer_token(request):
+    """
+    Token of an `Authorization: Bearer <token>` header, or None. Like
+    oauthlib, headers are read from META with or without their prefix.
+    """
+    header = request.META.get(
+        "HTTP_AUTHORIZATION", request.META.get("AUTHORIZATION", "")
+    )
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+def token_key(token):
+    """Cache key of a token, hashed so tokens aren't kept in clear"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """
+    Cache of validated access tokens, with their application and user,
+    by token hash. Entries last TTL seconds, never past the expiry of
+    their token.
+
+    Entries carry a stamp of their user, answered only while the user
+    keeps that stamp. The users signal handlers drop a token when it's
+    changed or revoked, and the stamp of a user when it's saved or
+    deleted, which drops all its tokens without looking them up. Like
+    the response cache, right away and again once the transaction
+    commits. With the "lru" backend only in the process making the
+    change, the "django" backend shares them between processes. Bulk
+    updates skip signals and must call forget_user.
+    """
+
+    def __init__(self, cache=None, stamps=None, options=None):
+        options = {**token_cache_settings(), **(options or {})}
+        self._cache = cache or build_cache(
+            options["BACKEND"],
+            max_entries=options["MAX_ENTRIES"],
+            alias=options["ALIAS"],
+            prefix="users:token:",
+        )
+        self._stamps = stamps or build_cache(
+            options["BACKEND"],
+            max_entries=options["MAX_ENTRIES"],
+            alias=options["ALIAS"],
+            prefix="users:token-user:",
+        )
+        self.ttl = options["TTL"]
+
+    @property
+    def stats(self):
+        """Cache hit, miss and eviction counters"""
+        return self._cache.stats.as_dict()
+
+    def get(self, token):
+        """
+        Return a copy of the cached access token, with its user, or None
+        when it's missing, expired or its user changed
+        """
+        entry = self._cache.get(token_key(token))
+        if entry is None:
+            return None
+        stamp, access_token = entry
+        if (
+            access_token.is_expired()
+            or self._stamps.get(str(access_token.user_id)) != stamp
+        ):
+            self._cache.delete(token_key(token))
+            return None
+        # Requests get their own copies, cached ones are never modified
+        user = copy.copy(access_token.user)
+        access_token = copy.copy(access_token)
+        access_token.user = user
+        return access_token
+
+    def set(self, access_token):
+        """Cache a validated access token until TTL or its expiry"""
+        remaining = (access_token.expires - timezone.now()).total_seconds()
+        ttl = min(self.ttl, int(remaining))
+        if ttl <= 0:
+            return
+        user_id = str(access_token.user_id)
+        stamp = self._stamps.get(user_id)
+        if stamp is None:
+            stamp = uuid.uuid4().hex
+            self._stamps.set(user_id, stamp, self.ttl)
+        entry = (stamp, access_token)
+        self._cache.set(token_key(access_token.token), entry, ttl)
+
+    def forget(self, token, using=None):
+        """Drop a cached token"""
+        key = token_key(token)
+        self._cache.delete(key)
+        transaction.on_commit(lambda: self._cache.delete(key), using=using)
+
+    def forget_user(self, user_id, using=None):
+        """Drop the cached tokens of a user"""
+        user_id = str(user_id)
+        self._stamps.delete(user_id)
+        transaction.on_commit(
+            lambda: self._stamps.delete(user_id), using=using
+        )
+
+    def clear(self):
+        """Drop every cached token"""
+        self._cache.clear()
+        self._stamps.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedOAuth2Authentication(OAuth2Authentication):
+    """
+    OAuth2 authentication answering bearer tokens from the token cache,
+    without queries, and validating them with django-oauth-toolkit
+    (token, application and user in a query) when they aren't cached.
+
+    The outcome is memoized on the Django request, so the api middleware
+    and DRF authenticate a request once between them.
+    """
+
+    def authenticate(self, request):
+        request = getattr(request, "_request", request)
+        if not hasattr(request, "_oauth2_authenticated"):
+            # pylint: disable=W0212
+            request._oauth2_authenticated = self._authenticate(request)
+        return request._oauth2_authenticated  # pylint: disable=W0212
+
+    def _authenticate(self, request):
+        token = bearer_token(request)
+        if token is None:
+            return super().authenticate(request)
+        access_token = token_cache.get(token)
+        if access_token is not None:
+            return access_token.user, access_token
+        result = super().authenticate(request)
+        if result is not None:
+            token_cache.set(result[1])
+        return result
@@ -0,0 +1,36 @@
+"""
+    Authentication backends module
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+
+UserModel = get_user_model()
+
+
+class HashingModelBackend(ModelBackend):
+    """
+    Model backend checking passwords through the hashing executor
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            manager = UserModel._default_manager  # pylint: disable=W0212
+            user = manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so timing doesn't tell which usernames exist
+            hashing.make_password(password)
+            return None
+
+        if not hashing.check_password(password, user.password):
+            return None
+        if hashing.must_update(user.password):
+            user.password = hashing.make_password(password)
+            user.save(update_fields=["password"])
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,167 @@
+"""
+    Circuit breaker and bulkhead module
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Exception raised when a call is rejected by an open circuit
+    """
+
+
+class BulkheadFullError(Exception):
+    """
+    Exception raised when there are no free slots for a call
+    """
+
+
+class CircuitBreaker:  # pylint: disable=R0902
+    """
+    Circuit breaker, opened after `failure_threshold` consecutive failures.
+
+    Once `recovery_timeout` seconds passed, up to `half_open_max_calls`
+    probes are let through, closing the circuit when they succeed and
+    opening it again on the first failure.
+    """
+
+    def __init__(
+        self,
+        name,
+        failure_threshold=5,
+        recovery_timeout=30,
+        half_open_max_calls=1,
+        exceptions=(Exception,),
+    ):  # pylint: disable=R0913
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.exceptions = exceptions
+        self.state = CLOSED
+        self.transitions = Counter()
+        self.rejections = 0
+        self._failures = 0
+        self._opened_at = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        """Move to a new state, must be called holding the lock"""
+        logger.warning(
+            "Circuit %s changed from %s to %s", self.name, self.state, state
+        )
+        self.transitions[f"{self.state}->{state}"] += 1
+        self.state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._failures = 0
+
+    def _acquire(self):
+        """Check if a call is allowed, rejecting it otherwise"""
+        with self._lock:
+            if self.state == OPEN:
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed >= self.recovery_timeout:
+                    self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    return
+            elif self.state == CLOSED:
+                return
+            self.rejections += 1
+        raise CircuitOpenError(f"Circuit {self.name} is {self.state}")
+
+    def _on_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+            self._failures = 0
+
+    def _on_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                self._transition(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker"""
+        self._acquire()
+        try:
+            result = func(*args, **kwargs)
+        except self.exceptions:
+            self._on_failure()
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+        self._on_success()
+        return result
+
+    def _release_probe(self):
+        """Give back a probe slot when the call didn't count"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def stats(self):
+        """Breaker state and counters"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self._failures,
+                "rejections": self.rejections,
+                "transitions": dict(self.transitions),
+            }
+
+
+class Bulkhead:
+    """
+    Cap of concurrent calls, waiting up to `timeout` seconds for a slot
+    """
+
+    def __init__(self, name, max_concurrent=10, timeout=0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.rejections = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.timeout:
+            acquired = self._semaphore.acquire(timeout=self.timeout)
+        else:
+            acquired = self._semaphore.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.rejections += 1
+            raise BulkheadFullError(f"Bulkhead {self.name} is full")
+        return self
+
+    def __exit__(self, *exc_info):
+        self._semaphore.release()
+
+    def stats(self):
+        """Bulkhead counters"""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "rejections": self.rejections,
+            }
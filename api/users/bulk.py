@@ -0,0 +1,168 @@
+"""
+    Bulk users creation module
+"""
+from django.db import IntegrityError, transaction
+
+from .conf import subscription_settings
+from .groups import refresh_stale_groups, resolve_groups
+from .hashing import make_passwords
+from .models import (
+    User,
+    UserGroup,
+    SUBSCRIPTION_PENDING,
+    SUBSCRIPTION_UNKNOWN,
+)
+from .serializers import UserBulkCreateItemSerializer
+from .subscription import subscription_service
+from .tasks import schedule_subscriptions
+
+
+USERNAME_EXISTS = "A user with that username already exists."
+
+
+def _failure(index, errors, status=400):
+    return {"index": index, "status": status, "errors": errors}
+
+
+def _success(index, user):
+    return {
+        "index": index,
+        "status": 201,
+        "id": str(user.id),
+        "username": user.username,
+    }
+
+
+def _validate(items, results):
+    """Validate every item, returning the valid ones by index"""
+    valid = {}
+    for index, item in enumerate(items):
+        serializer = UserBulkCreateItemSerializer(data=item)
+        if serializer.is_valid():
+            valid[index] = dict(serializer.validated_data)
+        else:
+            results[index] = _failure(index, serializer.errors)
+    return valid
+
+
+def _check_usernames(valid, results):
+    """Reject usernames already taken, or repeated in the batch"""
+    usernames = [data["username"] for data in valid.values()]
+    taken = set(
+        User.objects.filter(username__in=usernames).values_list(
+            "username", flat=True
+        )
+    )
+    for index, data in list(valid.items()):
+        if data["username"] in taken:
+            results[index] = _failure(index, {"username": [USERNAME_EXISTS]})
+            del valid[index]
+        taken.add(data["username"])
+
+
+def _subscriptions(ids, valid, results):
+    """Fetch the subscriptions of the batch, as a single bulk lookup"""
+    options = subscription_settings()
+    if options["MODE"] == "deferred":
+        return dict.fromkeys(ids, SUBSCRIPTION_PENDING)
+
+    fetched = subscription_service.fetch_subscriptions(ids.values())
+    statuses = {}
+    for index, uuid in ids.items():
+        result = fetched[str(uuid)]
+        if not isinstance(result, Exception):
+            statuses[index] = result["subscription"]
+        elif options["FALLBACK"] == SUBSCRIPTION_UNKNOWN:
+            statuses[index] = SUBSCRIPTION_UNKNOWN
+        else:
+            results[index] = _failure(
+                index, {"subscription": [str(result)]}, status=503
+            )
+            del valid[index]
+    return statuses
+
+
+def _refresh_groups(memberships):
+    """
+    Point the group rows of groups deleted since their ids were cached
+    to the groups resolved again, if there are any
+    """
+    rows = [row for rows in memberships.values() for row in rows]
+    fresh = refresh_stale_groups(row.group for row in rows)
+    if fresh is None:
+        return False
+    for row, group in zip(rows, fresh):
+        row.group = group
+    return True
+
+
+def _insert(users, memberships, results, retry=True):
+    """Insert users and their groups, one by one if the batch conflicts"""
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users.values())
+            UserGroup.objects.bulk_create(
+                row for rows in memberships.values() for row in rows
+            )
+    except IntegrityError:
+        if retry and _refresh_groups(memberships):
+            return _insert(users, memberships, results, retry=False)
+        created = {}
+        for index, user in users.items():
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                    UserGroup.objects.bulk_create(memberships[index])
+                created[index] = user
+            except IntegrityError as ex:
+                results[index] = _failure(
+                    index, {"non_field_errors": [str(ex)]}
+                )
+        return created
+    return users
+
+
+def _build_users(valid, ids, statuses, groups):
+    """Build users and their group rows, hashing passwords in parallel"""
+    passwords = make_passwords([data["password"] for data in valid.values()])
+    users = {}
+    memberships = {}
+    for (index, data), password in zip(valid.items(), passwords):
+        names = data.pop("groups")
+        data.pop("repeat_password", None)
+        data["password"] = password
+        user = User(id=ids[index], subscription=statuses[index], **data)
+        users[index] = user
+        memberships[index] = [
+            UserGroup(user_id=user.id, group=groups[name])
+            for name in dict.fromkeys(names)
+        ]
+    return users, memberships
+
+
+def bulk_create_users(items):
+    """
+    Create many users in bulk, returning a result per item.
+
+    Items are validated one by one, while usernames, groups and
+    subscriptions are resolved for the whole batch before a single
+    insert of users and another one of their groups.
+    """
+    results = [None] * len(items)
+    valid = _validate(items, results)
+    _check_usernames(valid, results)
+
+    pk_field = User._meta.pk  # pylint: disable=E1101,W0212
+    ids = {index: pk_field.get_default() for index in valid}
+    statuses = _subscriptions(ids, valid, results)
+    groups = resolve_groups(
+        name for data in valid.values() for name in data["groups"]
+    )
+
+    users, memberships = _build_users(valid, ids, statuses, groups)
+    created = _insert(users, memberships, results)
+    for index, user in created.items():
+        results[index] = _success(index, user)
+    if subscription_settings()["MODE"] == "deferred" and created:
+        schedule_subscriptions(user.id for user in created.values())
+    return results
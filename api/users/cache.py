@@ -0,0 +1,167 @@
+"""
+    Cache backends module
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss/eviction counters
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def incr(self, counter, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def as_dict(self):
+        """Counters snapshot"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class NullCacheBackend:
+    """
+    Backend that never stores anything
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):  # pylint: disable=W0613
+        """Always a miss"""
+        self.stats.incr("misses")
+
+    def set(self, key, value, ttl):
+        """Discard the value"""
+
+    def delete(self, key):
+        """Nothing to delete"""
+
+    def clear(self):
+        """Nothing to clear"""
+
+
+class LRUCacheBackend(NullCacheBackend):
+    """
+    In-process cache bounded by entries, expiring entries by TTL and
+    evicting the least recently used ones when full
+    """
+
+    def __init__(self, max_entries=1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the value or None when it's missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.stats.incr("hits")
+                    return value
+                del self._data[key]
+        self.stats.incr("misses")
+        return None
+
+    def set(self, key, value, ttl):
+        """Store a value during ttl seconds"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def delete(self, key):
+        """Remove a value"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every value"""
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend(NullCacheBackend):
+    """
+    Backend on top of Django's cache framework, shared between processes
+    when the configured cache is. Evictions are up to that cache.
+
+    Keys are namespaced by a generation number, so clearing only drops
+    this backend entries instead of the whole cache.
+    """
+
+    def __init__(self, alias="default", prefix=""):
+        super().__init__()
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    @property
+    def _generation_key(self):
+        return f"{self.prefix}generation"
+
+    def _key(self, key):
+        generation = self._cache.get_or_set(self._generation_key, 1, None)
+        return f"{self.prefix}{generation}:{key}"
+
+    def get(self, key):
+        """Return the value or None when it's missing"""
+        value = self._cache.get(self._key(key))
+        self.stats.incr("misses" if value is None else "hits")
+        return value
+
+    def set(self, key, value, ttl):
+        """Store a value during ttl seconds"""
+        self._cache.set(self._key(key), value, ttl)
+
+    def delete(self, key):
+        """Remove a value"""
+        self._cache.delete(self._key(key))
+
+    def clear(self):
+        """Remove every value"""
+        try:
+            self._cache.incr(self._generation_key)
+        except ValueError:
+            self._cache.set(self._generation_key, 2, None)
+
+
+def build_cache(backend, max_entries=1024, alias="default", prefix=""):
+    """Build a cache backend by name: lru, django or none"""
+    if backend == "lru":
+        return LRUCacheBackend(max_entries)
+    if backend == "django":
+        return DjangoCacheBackend(alias, prefix)
+    if backend in (None, "none"):
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend {backend}")
@@ -0,0 +1,97 @@
+"""
+    Users app settings module
+"""
+from django.conf import settings
+
+
+SUBSCRIPTION_DEFAULTS = {
+    "MOCK": True,
+    "BASE_API_URL": "https://subscriptions.fake.service.test/api/v1/",
+    "POOL_CONNECTIONS": 10,
+    "POOL_MAXSIZE": 10,
+    "POOL_BLOCK": False,
+    "CONNECT_TIMEOUT": 3.05,
+    "READ_TIMEOUT": 10,
+    "RETRIES": 3,
+    "BACKOFF_FACTOR": 0.2,
+    "BACKOFF_MAX": 5,
+    "BACKOFF_JITTER": 0.1,
+    "RETRY_STATUSES": (502, 503, 504),
+    "CACHE_BACKEND": "lru",
+    "CACHE_ALIAS": "default",
+    "CACHE_MAX_ENTRIES": 10000,
+    "CACHE_TTL": 300,
+    "CACHE_NEGATIVE_TTL": 30,
+    "MODE": "sync",
+    "EXECUTOR": "thread",
+    "WORKERS": 4,
+    "RESOLVE_RETRIES": 5,
+    "RESOLVE_BACKOFF": 1,
+    "BREAKER_FAILURES": 5,
+    "BREAKER_RECOVERY": 30,
+    "BREAKER_HALF_OPEN_CALLS": 1,
+    "MAX_CONCURRENT": 10,
+    "BULKHEAD_TIMEOUT": 0.5,
+    "FALLBACK": "fail",
+    "BATCH_SIZE": 100,
+    "BATCH_CONCURRENCY": 4,
+    "WEBHOOK_SECRET": "",
+    "WEBHOOK_ORDERING": "version",
+    "WEBHOOK_MAX_EVENTS": 10000,
+}
+
+USERS_API_DEFAULTS = {
+    "API_PREFIX": "/api/v1/",
+    "BULK_CREATE_MAX_ITEMS": 1000,
+    "GROUP_CACHE_TTL": 300,
+    "GROUP_CACHE_MAX_ENTRIES": 10000,
+    "LIST_PAGE_SIZE": 100,
+    "LIST_MAX_PAGE_SIZE": 1000,
+    "EXPORT_CHUNK_SIZE": 2000,
+    "MULTI_GET_MAX_IDS": 100,
+    "SEARCH_MAX_LIMIT": 100,
+    "SEARCH_CANDIDATES": 1000,
+    "RESPONSE_CACHE_BACKEND": "lru",
+    "RESPONSE_CACHE_ALIAS": "default",
+    "RESPONSE_CACHE_MAX_ENTRIES": 10000,
+    "RESPONSE_CACHE_TTL": 60,
+}
+
+PASSWORD_HASHING_DEFAULTS = {
+    "EXECUTOR": "sync",
+    "WORKERS": None,
+    "TIMEOUT": 30,
+}
+
+
+TOKEN_CACHE_DEFAULTS = {
+    "BACKEND": "lru",
+    "ALIAS": "default",
+    "MAX_ENTRIES": 10000,
+    "TTL": 60,
+}
+
+
+def _merged(name, defaults):
+    """Return the settings dict `name` merged over its defaults"""
+    return {**defaults, **getattr(settings, name, {})}
+
+
+def subscription_settings():
+    """Subscription service settings"""
+    return _merged("SUBSCRIPTION_SERVICE", SUBSCRIPTION_DEFAULTS)
+
+
+def users_api_settings():
+    """Users api settings"""
+    return _merged("USERS_API", USERS_API_DEFAULTS)
+
+
+def password_hashing_settings():
+    """Password hashing settings"""
+    return _merged("PASSWORD_HASHING", PASSWORD_HASHING_DEFAULTS)
+
+
+def token_cache_settings():
+    """Access token cache settings"""
+    return _merged("TOKEN_CACHE", TOKEN_CACHE_DEFAULTS)
@@ -0,0 +1,80 @@
+"""
+    Subscription change events module
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User
+from .responses import user_responses
+from .subscription import subscription_service
+
+
+def latest_events(events):
+    """Keep the newest event of every user"""
+    latest = {}
+    for event in events:
+        current = latest.get(event["id"])
+        if current is None or event["version"] >= current["version"]:
+            latest[event["id"]] = event
+    return latest
+
+
+def apply_subscription_events(events, batch_size=1000):
+    """
+    Apply subscription change events in bulk.
+
+    Events older than (or as old as) the stored version are stale and
+    skipped, so late deliveries can't overwrite newer changes.
+    """
+    latest = latest_events(events)
+    report = {
+        "received": len(events),
+        "duplicates": len(events) - len(latest),
+        "applied": 0,
+        "stale": 0,
+        "unknown": 0,
+    }
+    ids = list(latest)
+    now = timezone.now()
+    applied = []
+
+    with transaction.atomic():
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start : start + batch_size]
+            users = (
+                User.objects.select_for_update()
+                .filter(pk__in=batch)
+                .only("id", "subscription", "subscription_version")
+            )
+            changed = []
+            found = 0
+            for user in users:
+                found += 1
+                event = latest[user.pk]
+                if event["version"] <= user.subscription_version:
+                    report["stale"] += 1
+                    continue
+                user.subscription = event["subscription"]
+                user.subscription_version = event["version"]
+                user.updated = now
+                changed.append(user)
+
+            if changed:
+                User.objects.bulk_update(
+                    changed,
+                    ["subscription", "subscription_version", "updated"],
+                )
+            report["unknown"] += len(batch) - found
+            applied.extend(user.pk for user in changed)
+
+        transaction.on_commit(lambda: _invalidate(applied))
+
+    report["applied"] = len(applied)
+    return report
+
+
+def _invalidate(uuids):
+    """Drop the cached lookups and responses of changed users"""
+    for uuid in uuids:
+        subscription_service.invalidate(uuid)
+    user_responses.forget(uuids)
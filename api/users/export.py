@@ -0,0 +1,97 @@
+"""
+    Users export module
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import User, UserGroup
+
+
+EXPORT_FIELDS = (
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_staff",
+    "is_active",
+    "subscription",
+    "created",
+    "updated",
+)
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def format_datetime(value):
+    """ISO 8601 in the current timezone, like the api answers dates"""
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def iter_user_chunks(queryset=None, chunk_size=2000):
+    """
+    Yield the users of queryset as dicts, a list per chunk. Rows come
+    from a server-side cursor where supported and the group names of a
+    chunk are read in a single query, so memory is bound by chunk_size.
+    """
+    queryset = User.objects if queryset is None else queryset
+    rows = queryset.order_by().values_list(*EXPORT_FIELDS)
+    rows = rows.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        users = {}
+        for row in chunk:
+            user = dict(zip(EXPORT_FIELDS, row))
+            user["id"] = str(user["id"])
+            user["created"] = format_datetime(user["created"])
+            user["updated"] = format_datetime(user["updated"])
+            user["groups"] = []
+            users[row[0]] = user
+        memberships = UserGroup.objects.filter(
+            user_id__in=users.keys()
+        ).values_list("user_id", "group__name")
+        for user_id, name in memberships:
+            users[user_id]["groups"].append(name)
+        yield list(users.values())
+
+
+def _ndjson(chunks):
+    for users in chunks:
+        yield "".join(json.dumps(user) + "\n" for user in users)
+
+
+def _csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS + ("groups",))
+    for users in chunks:
+        for user in users:
+            user["groups"] = ";".join(user["groups"])
+            writer.writerow(user.values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # A table without users still gets its header
+    yield buffer.getvalue()
+
+
+def export_users(output="ndjson", queryset=None, chunk_size=2000):
+    """Stream users as ndjson or csv text, a piece per chunk"""
+    if output not in CONTENT_TYPES:
+        raise ValueError(f"Unknown export format {output}")
+    chunks = iter_user_chunks(queryset, chunk_size)
+    return _ndjson(chunks) if output == "ndjson" else _csv(chunks)
@@ -0,0 +1,178 @@
+"""
+    Fake subscription service, to test the client against a real server
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .ratelimit import TokenBucket
+
+
+API_PREFIX = "/api/v1/users"
+
+
+# pylint: disable=R0903
+class Latency:
+    """
+    Latency distribution, built from specs like:
+
+        fixed:0.05
+        uniform:0.01,0.2
+        exponential:0.05 (mean)
+        lognormal:0.05,0.5 (median, sigma)
+    """
+
+    DISTRIBUTIONS = {
+        "fixed": lambda value: value,
+        "uniform": random.uniform,
+        "exponential": lambda mean: random.expovariate(1 / mean),
+        "lognormal": lambda median, sigma: median
+        * random.lognormvariate(0, sigma),
+    }
+
+    def __init__(self, spec="fixed:0"):
+        name, _, params = spec.partition(":")
+        if name not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {name}")
+        self.spec = spec
+        self._sample = self.DISTRIBUTIONS[name]
+        self._params = [float(param) for param in params.split(",") if param]
+
+    def sample(self):
+        """Draw a latency in seconds"""
+        return max(0, self._sample(*self._params)) if self._params else 0
+
+
+class FakeSubscriptionHandler(BaseHTTPRequestHandler):
+    """
+    Handler answering single and batch subscription lookups
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Requests are counted instead of logged"""
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Answer a lookup, injecting the configured faults"""
+        server = self.server
+        server.count("requests")
+        url = urlparse(self.path)
+
+        if server.bucket and not server.bucket.try_acquire():
+            server.count("throttled")
+            self._send(429, {"detail": "Throttled"}, {"Retry-After": "1"})
+            return
+
+        delay = server.latency.sample()
+        if random.random() < server.stall_rate:
+            delay += server.stall
+        time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            server.count("errors")
+            self._send(server.error_status, {"detail": "Injected error"})
+            return
+
+        if url.path == API_PREFIX:
+            ids = parse_qs(url.query).get("ids", [""])[0].split(",")
+            body = {
+                "results": [
+                    {"id": uid, "subscription": server.subscription}
+                    for uid in ids
+                    if uid
+                ]
+            }
+            self._send(200, body)
+        elif url.path.startswith(f"{API_PREFIX}/"):
+            uid = url.path.rsplit("/", 1)[-1]
+            self._send(200, {"id": uid, "subscription": server.subscription})
+        else:
+            self._send(404, {"detail": "Not found"})
+
+
+# pylint: disable=R0902
+class FakeSubscriptionServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the subscription service.
+
+    Every response is delayed by a latency drawn from `latency`, a
+    `stall_rate` fraction of them by `stall` extra seconds, and an
+    `error_rate` fraction fails with `error_status`. Requests above
+    `rate` per second are answered with a 429.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        *,
+        latency="fixed:0",
+        error_rate=0,
+        error_status=503,
+        stall_rate=0,
+        stall=0,
+        rate=None,
+        subscription="active",
+    ):  # pylint: disable=R0913
+        super().__init__(address, FakeSubscriptionHandler)
+        self.latency = Latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.bucket = TokenBucket(rate) if rate else None
+        self.subscription = subscription
+        self.counters = dict.fromkeys(
+            ("connections", "requests", "errors", "throttled"), 0
+        )
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base API url to configure the client with"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1/"
+
+    def handle_error(self, request, client_address):
+        """Clients giving up on stalled requests are expected"""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count(self, counter):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[counter] += 1
+
+    def start(self):
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,49 @@
+"""
+    Sparse fieldsets module
+"""
+from rest_framework.exceptions import ValidationError
+
+
+# Loaded whatever the fields, for pagination and response versions
+VERSION_COLUMNS = ("id", "created", "updated", "groups_version")
+
+
+def parse_fields(value, allowed):
+    """
+    Field names of a `fields=a,b` parameter, None when it's missing.
+    Names outside allowed are rejected.
+    """
+    if value is None:
+        return None
+    names = [name for name in value.split(",") if name]
+    if not names:
+        raise ValidationError({"fields": "A list of fields is required."})
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValidationError(
+            {"fields": f"Unknown fields: {', '.join(unknown)}."}
+        )
+    return names
+
+
+def serializer_fields(serializer_class, requested=None):
+    """
+    Fields of serializer_class to answer, in its order: the requested
+    ones it has, or all of them
+    """
+    fields = serializer_class.Meta.fields
+    if requested is None:
+        return list(fields)
+    return [name for name in fields if name in requested]
+
+
+def project_users(queryset, fields):
+    """
+    Users of queryset loading only the columns of fields, and their
+    groups only when fields have them
+    """
+    columns = [name for name in fields if name != "groups"]
+    queryset = queryset.only(*VERSION_COLUMNS, *columns)
+    if "groups" in fields:
+        queryset = queryset.prefetch_related("groups")
+    return queryset
@@ -0,0 +1,59 @@
+"""
+    Users list filters module
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+BOOLEANS = {"true": True, "1": True, "false": False, "0": False}
+
+
+def _boolean(name, value):
+    try:
+        return BOOLEANS[value.lower()]
+    except KeyError as ex:
+        raise ValidationError({name: "Must be true or false."}) from ex
+
+
+def _datetime(name, value):
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Must be an ISO 8601 datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+# pylint: disable=R0903
+class UserFilterBackend(BaseFilterBackend):
+    """
+    Filters of the users list:
+
+        subscription=<status>
+        group=<group name>
+        is_staff=true|false
+        created_after=<datetime> (inclusive)
+        created_before=<datetime> (exclusive)
+    """
+
+    lookups = {
+        "subscription": ("subscription", str),
+        "group": ("groups__name", str),
+        "is_staff": ("is_staff", _boolean),
+        "created_after": ("created__gte", _datetime),
+        "created_before": ("created__lt", _datetime),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        for param, (lookup, parse) in self.lookups.items():
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            filters[lookup] = value if parse is str else parse(param, value)
+        return queryset.filter(**filters)
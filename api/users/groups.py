@@ -0,0 +1,115 @@
+"""
+    Groups resolution module
+"""
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, router, transaction
+
+from .cache import LRUCacheBackend
+from .conf import users_api_settings
+
+
+class GroupCache(LRUCacheBackend):
+    """
+    Process-level cache of group ids by name.
+
+    Ids are only cached once the transaction that read or created them
+    commits, so a rollback never leaves ids of missing rows behind.
+    Changes made by other processes are picked up after the TTL, writes
+    of groups they deleted are retried with `write_with_groups`.
+    """
+
+    def get_many(self, names):
+        """Return the cached ids of names, mapped by name"""
+        found = {}
+        for name in names:
+            group_id = self.get(name)
+            if group_id is not None:
+                found[name] = group_id
+        return found
+
+    def set_many(self, ids, using=None):
+        """Cache ids by name once the current transaction commits"""
+        ttl = users_api_settings()["GROUP_CACHE_TTL"]
+
+        def store():
+            for name, group_id in ids.items():
+                self.set(name, group_id, ttl)
+
+        transaction.on_commit(store, using=using)
+
+    def forget(self, names):
+        """Drop the cached ids of names"""
+        for name in names:
+            self.delete(name)
+
+
+group_cache = GroupCache(users_api_settings()["GROUP_CACHE_MAX_ENTRIES"])
+
+
+def _as_groups(ids, using):
+    return {
+        name: Group.from_db(using, ["id", "name"], (group_id, name))
+        for name, group_id in ids.items()
+    }
+
+
+def resolve_groups(names):
+    """
+    Return groups mapped by name, creating the missing ones.
+
+    At most one query for the names that aren't cached, plus an insert
+    and a query for the ones that don't exist yet.
+    """
+    names = set(names)
+    using = router.db_for_write(Group)
+    found = group_cache.get_many(names)
+    missing = names - found.keys()
+    if missing:
+        ids = dict(
+            Group.objects.filter(name__in=missing).values_list("name", "id")
+        )
+        absent = missing - ids.keys()
+        if absent:
+            Group.objects.bulk_create(
+                [Group(name=name) for name in absent], ignore_conflicts=True
+            )
+            ids.update(
+                Group.objects.filter(name__in=absent).values_list("name", "id")
+            )
+        group_cache.set_many(ids, using=using)
+        found.update(ids)
+    return _as_groups(found, using)
+
+
+def refresh_stale_groups(groups):
+    """
+    Return groups resolved again past the cache, in order, when some of
+    them no longer exist (deleted by another process since their ids were
+    cached), or None when they all do
+    """
+    groups = list(groups)
+    ids = {group.id for group in groups}
+    if Group.objects.filter(pk__in=ids).count() == len(ids):
+        return None
+    names = [group.name for group in groups]
+    group_cache.forget(names)
+    resolved = resolve_groups(names)
+    return [resolved[name] for name in names]
+
+
+def write_with_groups(write, groups):
+    """
+    Call write(groups) in a transaction, retrying it once with the groups
+    resolved again when cached ids of deleted groups break its foreign
+    keys. Deferred foreign keys are only checked on commit, so stale ids
+    are caught when no outer transaction is open.
+    """
+    try:
+        with transaction.atomic():
+            return write(groups)
+    except IntegrityError:
+        fresh = refresh_stale_groups(groups)
+        if fresh is None:
+            raise
+    with transaction.atomic():
+        return write(fresh)
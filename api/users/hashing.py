@@ -0,0 +1,153 @@
+"""
+    Password hashing module
+
+    Hashing is CPU bound and holds the GIL, with the `process` executor
+    it's offloaded to a pool of processes, so a worker keeps serving
+    requests while passwords are hashed on the other cores.
+"""
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.contrib.auth import hashers
+
+from .conf import password_hashing_settings
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None  # pylint: disable=C0103
+_executor_lock = threading.Lock()
+
+
+def _init_worker(settings_module):
+    """Set up django in pool processes"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def get_executor():
+    """Return the process pool, or None when hashing is synchronous"""
+    global _executor  # pylint: disable=W0603
+    options = password_hashing_settings()
+    if options["EXECUTOR"] != "process":
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=options["WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+            )
+    return _executor
+
+
+def _reset_executor(executor):
+    """Drop a broken pool, a new one is started on the next call"""
+    global _executor  # pylint: disable=W0603
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def _run(func, *args):
+    """
+    Run func in the pool, falling back to the calling thread when the
+    pool is broken or doesn't answer within TIMEOUT seconds
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    future = None
+    try:
+        future = executor.submit(func, *args)
+        return future.result(timeout=password_hashing_settings()["TIMEOUT"])
+    except BrokenProcessPool:
+        logger.warning("Password hashing pool broken, hashing in process")
+        _reset_executor(executor)
+    except concurrent.futures.TimeoutError:
+        logger.warning("Password hashing pool timed out, hashing in process")
+        future.cancel()
+    return func(*args)
+
+
+def make_password(password):
+    """Hash a password"""
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """Check a password against its hash"""
+    return _run(hashers.check_password, password, encoded)
+
+
+def must_update(encoded):
+    """Check if a hash should be upgraded to the current hasher"""
+    try:
+        return hashers.identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        return False
+
+
+def _wait_progress(futures, timeout):
+    """
+    Wait for futures as long as one completes every timeout seconds,
+    return the ones still pending when the pool stalls
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending,
+            timeout=timeout,
+            return_when=concurrent.futures.FIRST_COMPLETED,
+        )
+        if not done:
+            break
+    return pending
+
+
+def make_passwords(passwords):
+    """
+    Hash many passwords, in parallel when there is a pool. Like _run, it
+    falls back to the calling thread when the pool is broken, or for the
+    passwords left when it hashes none within TIMEOUT seconds.
+    """
+    executor = get_executor()
+    if executor is None:
+        return [hashers.make_password(password) for password in passwords]
+    try:
+        futures = [
+            executor.submit(hashers.make_password, password)
+            for password in passwords
+        ]
+    except BrokenProcessPool:
+        logger.warning("Password hashing pool broken, hashing in process")
+        _reset_executor(executor)
+        return [hashers.make_password(password) for password in passwords]
+
+    pending = _wait_progress(futures, password_hashing_settings()["TIMEOUT"])
+    if pending:
+        logger.warning("Password hashing pool timed out, hashing in process")
+    encoded = []
+    broken = False
+    for future, password in zip(futures, passwords):
+        if future in pending:
+            future.cancel()
+        else:
+            try:
+                encoded.append(future.result())
+                continue
+            except BrokenProcessPool:
+                broken = True
+        encoded.append(hashers.make_password(password))
+    if broken:
+        logger.warning("Password hashing pool broken, hashing in process")
+        _reset_executor(executor)
+    return encoded
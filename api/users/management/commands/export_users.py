@@ -0,0 +1,38 @@
+"""
+    Command to export users
+"""
+from django.core.management.base import BaseCommand
+
+from users.conf import users_api_settings
+from users.export import CONTENT_TYPES, export_users
+
+
+class Command(BaseCommand):
+    """
+    Export every user as ndjson or csv
+    """
+
+    help = "Export users as ndjson or csv, to stdout or a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(CONTENT_TYPES), default="ndjson"
+        )
+        parser.add_argument("--output", help="File to write, stdout if not")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=users_api_settings()["EXPORT_CHUNK_SIZE"],
+        )
+
+    def handle(self, *args, **options):
+        pieces = export_users(
+            options["format"], chunk_size=options["chunk_size"]
+        )
+        if not options["output"]:
+            for piece in pieces:
+                self.stdout.write(piece, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as out:
+            for piece in pieces:
+                out.write(piece)
@@ -0,0 +1,52 @@
+"""
+    Command to run a local fake subscription service
+"""
+from django.core.management.base import BaseCommand
+
+from users.fakeserver import FakeSubscriptionServer
+
+
+class Command(BaseCommand):
+    """
+    Run a fake subscription service with latency and failure injection
+    """
+
+    help = "Run a local fake subscription service for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument(
+            "--latency",
+            default="fixed:0",
+            help="fixed:S, uniform:MIN,MAX, exponential:MEAN "
+            "or lognormal:MEDIAN,SIGMA",
+        )
+        parser.add_argument("--error-rate", type=float, default=0)
+        parser.add_argument("--error-status", type=int, default=503)
+        parser.add_argument("--stall-rate", type=float, default=0)
+        parser.add_argument("--stall", type=float, default=0)
+        parser.add_argument(
+            "--rate", type=float, help="Requests per second allowed"
+        )
+        parser.add_argument("--subscription", default="active")
+
+    def handle(self, *args, **options):
+        server = FakeSubscriptionServer(
+            (options["host"], options["port"]),
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            stall_rate=options["stall_rate"],
+            stall=options["stall"],
+            rate=options["rate"],
+            subscription=options["subscription"],
+        )
+        self.stdout.write(f"Fake subscription service on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {server.counters}")
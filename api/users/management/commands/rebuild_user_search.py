@@ -0,0 +1,23 @@
+"""
+    Command to rebuild the users search index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from users.search import install_sqlite_search, rebuild_sqlite_search
+
+
+class Command(BaseCommand):
+    """
+    Index every user again in the SQLite search table, needed after a
+    VACUUM. PostgreSQL trigram indexes don't need it.
+    """
+
+    help = "Rebuild the SQLite users search index, run it after a VACUUM"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Only the SQLite search index needs rebuilds")
+        install_sqlite_search(connection)
+        rebuild_sqlite_search(connection)
+        self.stdout.write("Users search index rebuilt")
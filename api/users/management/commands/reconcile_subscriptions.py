@@ -0,0 +1,34 @@
+"""
+    Command to re-sync users subscription
+"""
+from django.core.management.base import BaseCommand
+
+from users.reconciliation import reconcile_subscriptions
+
+
+class Command(BaseCommand):
+    """
+    Re-sync the subscription of every user with the subscription service
+    """
+
+    help = "Re-sync users subscription, resuming from a checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--rate", type=float, help="Users per second to look up"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="reconcile_subscriptions.json",
+            help="Checkpoint file, the run resumes from it when it exists",
+        )
+
+    def handle(self, *args, **options):
+        report = reconcile_subscriptions(
+            chunk_size=options["chunk_size"],
+            rate=options["rate"],
+            checkpoint=options["checkpoint"],
+            progress=lambda report: self.stdout.write(str(report)),
+        )
+        self.stdout.write(f"Done: {report}")
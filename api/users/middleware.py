@@ -0,0 +1,48 @@
+"""
+    Api middleware module
+
+    Api requests (under USERS_API["API_PREFIX"]) authenticate with
+    bearer tokens only. Their user is set before the session and CSRF
+    middlewares see them, which then have nothing to load or store.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from oauth2_provider.middleware import OAuth2TokenMiddleware
+
+from .authentication import CachedOAuth2Authentication
+from .conf import users_api_settings
+
+
+def is_api_request(request):
+    """Check if a request is for the api"""
+    return request.path_info.startswith(users_api_settings()["API_PREFIX"])
+
+
+class ApiAuthenticationMiddleware(
+    OAuth2TokenMiddleware
+):  # pylint: disable=R0903
+    """
+    Bearer token authentication of api requests, in place of
+    OAuth2TokenMiddleware and before AuthenticationMiddleware, which
+    keeps the user set here instead of reading the session one.
+
+    request.user is resolved lazily through the same memoized
+    authentication DRF uses, so a request validates its token once at
+    most, whoever asks first. Other requests go through
+    OAuth2TokenMiddleware.
+    """
+
+    def __call__(self, request):
+        if not is_api_request(request):
+            return super().__call__(request)
+
+        def user():
+            result = CachedOAuth2Authentication().authenticate(request)
+            return AnonymousUser() if result is None else result[0]
+
+        # pylint: disable=W0212
+        request.user = request._cached_user = SimpleLazyObject(user)
+        response = self.get_response(request)
+        patch_vary_headers(response, ("Authorization",))
+        return response
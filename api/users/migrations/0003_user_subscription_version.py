@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_user_created_user_updated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="subscription_version",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
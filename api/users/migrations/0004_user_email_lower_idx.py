@@ -0,0 +1,25 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:53
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+from users.operations import AddIndexOnline
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0003_user_subscription_version"),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                condition=models.Q(("email", ""), _negated=True),
+                name="users_user_email_lower_idx",
+            ),
+        ),
+    ]
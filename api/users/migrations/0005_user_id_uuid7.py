@@ -0,0 +1,29 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:57
+
+from django.db import migrations, models
+import users.uuids
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_user_email_lower_idx"),
+    ]
+
+    # The default is applied by django, the column doesn't change and
+    # existing ids are kept, so only the state is altered
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="user",
+                    name="id",
+                    field=models.UUIDField(
+                        default=users.uuids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+from users.operations import AddIndexOnline
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0005_user_id_uuid7"),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name="user",
+            index=models.Index(
+                fields=["created", "id"], name="users_user_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.1.7 on 2026-10-18 17:20
+
+from django.db import migrations
+
+
+# A snapshot of users.search as of this migration, later changes to the
+# search module must not change what it installs
+
+SEARCH_FIELDS = ("username", "first_name", "last_name", "email")
+
+SQLITE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS users_user_search USING fts5(
+    username, first_name, last_name, email,
+    content='users_user',
+    tokenize='trigram'
+)
+"""
+
+SQLITE_TRIGGERS = {
+    "users_user_search_insert": """
+CREATE TRIGGER IF NOT EXISTS users_user_search_insert
+AFTER INSERT ON users_user BEGIN
+    INSERT INTO users_user_search(
+        rowid, username, first_name, last_name, email
+    )
+    VALUES (
+        new.rowid, new.username, new.first_name, new.last_name, new.email
+    );
+END
+""",
+    "users_user_search_delete": """
+CREATE TRIGGER IF NOT EXISTS users_user_search_delete
+AFTER DELETE ON users_user BEGIN
+    INSERT INTO users_user_search(
+        users_user_search, rowid, username, first_name, last_name, email
+    )
+    VALUES (
+        'delete', old.rowid, old.username, old.first_name, old.last_name,
+        old.email
+    );
+END
+""",
+    "users_user_search_update": """
+CREATE TRIGGER IF NOT EXISTS users_user_search_update
+AFTER UPDATE OF username, first_name, last_name, email
+ON users_user BEGIN
+    INSERT INTO users_user_search(
+        users_user_search, rowid, username, first_name, last_name, email
+    )
+    VALUES (
+        'delete', old.rowid, old.username, old.first_name, old.last_name,
+        old.email
+    );
+    INSERT INTO users_user_search(
+        rowid, username, first_name, last_name, email
+    )
+    VALUES (
+        new.rowid, new.username, new.first_name, new.last_name, new.email
+    );
+END
+""",
+}
+
+SQLITE_REBUILD = (
+    "INSERT INTO users_user_search(users_user_search) VALUES ('rebuild')"
+)
+
+POSTGRES_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS users_user_{field}_trgm_idx "
+    'ON users_user USING gin (UPPER("{field}"::text) gin_trgm_ops)'
+)
+
+
+def install(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for field in SEARCH_FIELDS:
+                cursor.execute(POSTGRES_INDEX.format(field=field))
+        elif conn.vendor == "sqlite":
+            cursor.execute(SQLITE_TABLE)
+            for sql in SQLITE_TRIGGERS.values():
+                cursor.execute(sql)
+            cursor.execute(SQLITE_REBUILD)
+
+
+def uninstall(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for field in SEARCH_FIELDS:
+                cursor.execute(
+                    "DROP INDEX CONCURRENTLY IF EXISTS "
+                    f"users_user_{field}_trgm_idx"
+                )
+        elif conn.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute("DROP TABLE IF EXISTS users_user_search")
+
+
+class Migration(migrations.Migration):
+    # Trigram indexes are built concurrently on PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_user_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall, atomic=False),
+    ]
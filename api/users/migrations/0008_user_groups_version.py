@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0007_user_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="groups_version",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -1,17 +1,44 @@
 """
     Users model
 """
-import uuid
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 
+from .uuids import uuid7
+
+
+SUBSCRIPTION_PENDING = "pending"
+SUBSCRIPTION_UNKNOWN = "unknown"
+
 
 class User(AbstractUser):
     """
     Model class to extend base user and to add the needed fields
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     subscription = models.CharField(max_length=20)
+    subscription_version = models.BigIntegerField(default=0)
+    # Bumped when the groups of the user change, or their names
+    groups_version = models.BigIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):  # pylint: disable=C0115,R0903
+        indexes = [
+            # Not unique, as existing rows may repeat emails by case
+            models.Index(
+                Lower("email"),
+                name="users_user_email_lower_idx",
+                condition=~Q(email=""),
+            ),
+            # Keyset pagination of the users list
+            models.Index(
+                fields=["created", "id"], name="users_user_created_id_idx"
+            ),
+        ]
+
+
+UserGroup = User.groups.through  # pylint: disable=E1101
@@ -0,0 +1,35 @@
+"""
+    Migration operations
+"""
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexOnline(AddIndex):
+    """
+    AddIndex building the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so big tables aren't locked for writes meanwhile.
+    Migrations using it must set `atomic = False`.
+    """
+
+    def _kwargs(self, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            return {"concurrently": True}
+        return {}
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **self._kwargs(schema_editor)
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **self._kwargs(schema_editor)
+            )
@@ -0,0 +1,113 @@
+"""
+    Keyset pagination module
+"""
+import base64
+import binascii
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .conf import users_api_settings
+
+
+def encode_cursor(created, user_id):
+    """Opaque cursor pointing after the row (created, user_id)"""
+    position = json.dumps([created.isoformat(), str(user_id)])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the (created, id) position of a cursor"""
+    try:
+        created, user_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        created = parse_datetime(created)
+        user_id = uuid.UUID(user_id)
+    except (binascii.Error, TypeError, ValueError) as ex:
+        raise ValidationError({"cursor": "Invalid cursor."}) from ex
+    if created is None:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return created, user_id
+
+
+class KeysetPagination(BasePagination):  # pylint: disable=W0223
+    """
+    Pagination walking users from the newest, by (created, id).
+
+    Pages are read with a range on the users_user_created_id_idx index
+    instead of an OFFSET, so every page costs the same however deep the
+    cursor is. Rows inserted meanwhile never shift or repeat pages.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created", "-id")
+
+    def __init__(self):
+        self.request = None
+        self.next_cursor = None
+
+    def get_page_size(self, request):
+        """Requested page size, capped to the configured maximum"""
+        options = users_api_settings()
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return options["LIST_PAGE_SIZE"]
+        try:
+            size = int(value)
+        except ValueError as ex:
+            raise ValidationError({"page_size": "Must be a number."}) from ex
+        if size < 1:
+            raise ValidationError({"page_size": "Must be positive."})
+        return min(size, options["LIST_MAX_PAGE_SIZE"])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created, user_id = decode_cursor(cursor)
+            # created <= c is the index range, the exclusion only drops
+            # the rows of the last page sharing its created value
+            queryset = queryset.filter(created__lte=created).exclude(
+                Q(created=created) & Q(id__gte=user_id)
+            )
+
+        rows = list(queryset[: page_size + 1])
+        page = rows[:page_size]
+        if len(rows) > page_size:
+            last = page[-1]
+            self.next_cursor = encode_cursor(last.created, last.pk)
+        return page
+
+    def get_next_link(self):
+        """Url of the next page, None on the last one"""
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor
+        )
+
+    def get_first_link(self):
+        """Url of the first page"""
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "first": self.get_first_link(),
+                "next": self.get_next_link(),
+                "results": data,
+            }
+        )
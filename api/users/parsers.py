@@ -0,0 +1,31 @@
+"""
+    Parsers module
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+# pylint: disable=R0903
+class NDJSONParser(BaseParser):
+    """
+    Parser for newline delimited json, one object per line
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as ex:
+                raise ParseError(f"Line {number}: {ex}") from ex
+        return items
@@ -1,8 +1,13 @@
 """
     Permissions utils module
 """
+import hashlib
+import hmac
+
 from rest_framework import permissions
 
+from .conf import subscription_settings
+
 
 class IsStaff(permissions.BasePermission):
     """
@@ -54,3 +59,22 @@ class PermissionsIsolatedMixin:
             if hasattr(action_method, "permission_classes"):
                 return [perm() for perm in action_method.permission_classes]
         return super().get_permissions()
+
+
+class HasWebhookSignature(permissions.BasePermission):
+    """
+    Permission to allow requests signed with the webhook secret, as a
+    `sha256=<hex digest>` HMAC of the body
+    """
+
+    header = "HTTP_X_SUBSCRIPTION_SIGNATURE"
+
+    def has_permission(self, request, view):
+        secret = subscription_settings()["WEBHOOK_SECRET"]
+        if not secret:
+            return False
+        digest = hmac.new(
+            secret.encode(), request.body, hashlib.sha256
+        ).hexdigest()
+        signature = request.META.get(self.header, "")
+        return hmac.compare_digest(signature, f"sha256={digest}")
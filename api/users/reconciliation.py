@@ -0,0 +1,171 @@
+"""
+    Subscription reconciliation module
+"""
+import json
+import logging
+import os
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User
+from .ratelimit import TokenBucket
+from .responses import user_responses
+from .subscription import subscription_service
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReconcileReport:
+    """
+    Reconciliation progress counters
+    """
+
+    def __init__(self, processed=0, updated=0, failed=0, last_pk=None):
+        self.processed = processed
+        self.updated = updated
+        self.failed = failed
+        self.last_pk = last_pk
+        self.started = time.monotonic()
+        self._resumed_at = processed
+
+    @property
+    def rate(self):
+        """Users processed per second in this run"""
+        elapsed = time.monotonic() - self.started
+        processed = self.processed - self._resumed_at
+        return processed / elapsed if elapsed else 0
+
+    def as_dict(self):
+        """Counters to persist as checkpoint"""
+        return {
+            "processed": self.processed,
+            "updated": self.updated,
+            "failed": self.failed,
+            "last_pk": self.last_pk,
+        }
+
+    def __str__(self):
+        return (
+            f"{self.processed} processed, {self.updated} updated, "
+            f"{self.failed} failed ({self.rate:.1f} users/s)"
+        )
+
+
+class Checkpoint:
+    """
+    Reconciliation checkpoint, stored as a json file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Report stored by the last run, if any"""
+        if not self.path or not os.path.exists(self.path):
+            return ReconcileReport()
+        with open(self.path, encoding="utf-8") as checkpoint:
+            return ReconcileReport(**json.load(checkpoint))
+
+    def save(self, report):
+        """Store the report, replacing the file atomically"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint:
+            json.dump(report.as_dict(), checkpoint)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Remove the checkpoint once the run is complete"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_user_chunks(chunk_size, after=None):
+    """Iterate users by primary key, chunk by chunk"""
+    queryset = User.objects.only(
+        "id", "subscription", "subscription_version"
+    ).order_by("pk")
+    while True:
+        page = queryset.filter(pk__gt=after) if after else queryset
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1].pk
+
+
+def store_unversioned(users):
+    """
+    Store the polled subscriptions of users whose subscription version
+    didn't move since they were read, and return them. A newer version
+    was set by a webhook event, which polled values mustn't overwrite.
+    """
+    with transaction.atomic():
+        versions = dict(
+            User.objects.select_for_update()
+            .filter(pk__in=[user.pk for user in users])
+            .values_list("pk", "subscription_version")
+        )
+        users = [
+            user
+            for user in users
+            if versions.get(user.pk) == user.subscription_version
+        ]
+        if users:
+            User.objects.bulk_update(users, ["subscription", "updated"])
+    return users
+
+
+def reconcile_chunk(chunk, report):
+    """Fetch subscriptions of a chunk and store the changed ones"""
+    results = subscription_service.fetch_subscriptions(
+        [user.pk for user in chunk], refresh=True
+    )
+    now = timezone.now()
+    changed = []
+    for user in chunk:
+        result = results[str(user.pk)]
+        if isinstance(result, Exception):
+            report.failed += 1
+        elif result["subscription"] != user.subscription:
+            user.subscription = result["subscription"]
+            user.updated = now
+            changed.append(user)
+
+    if changed:
+        changed = store_unversioned(changed)
+        user_responses.forget(user.pk for user in changed)
+    report.processed += len(chunk)
+    report.updated += len(changed)
+    report.last_pk = str(chunk[-1].pk)
+    return changed
+
+
+def reconcile_subscriptions(
+    chunk_size=500, rate=None, checkpoint=None, progress=None
+):
+    """
+    Re-sync the subscription of every user, `rate` users per second at
+    most. The run resumes from `checkpoint` when a previous one stopped.
+    """
+    checkpoint = Checkpoint(checkpoint)
+    report = checkpoint.load()
+    if report.last_pk:
+        logger.info("Resuming reconciliation after %s", report.last_pk)
+    bucket = TokenBucket(rate, burst=max(rate, chunk_size)) if rate else None
+
+    for chunk in iter_user_chunks(chunk_size, after=report.last_pk):
+        if bucket:
+            bucket.acquire(len(chunk))
+        reconcile_chunk(chunk, report)
+        checkpoint.save(report)
+        logger.info("Reconciliation: %s", report)
+        if progress:
+            progress(report)
+
+    checkpoint.clear()
+    return report
@@ -0,0 +1,96 @@
+"""
+    User responses cache module
+"""
+import zlib
+
+from django.db import transaction
+
+from .cache import build_cache
+from .conf import users_api_settings
+
+
+DETAILED = "detailed"
+BASIC = "basic"
+VARIANTS = (DETAILED, BASIC)
+
+
+def user_etag(variant, updated, groups_version, fields=None):
+    """
+    ETag of a user response, from its variant, the user version and the
+    fields of a sparse fieldset
+    """
+    stamp = int(updated.timestamp() * 1_000_000)
+    if fields is not None:
+        variant = f"{variant}-{zlib.crc32(','.join(fields).encode()):08x}"
+    return f'"{variant}-{stamp}-{groups_version}"'
+
+
+class UserResponseCache:
+    """
+    Cache of serialized users by id and serializer variant (detailed
+    or basic), during RESPONSE_CACHE_TTL seconds.
+
+    Entries are dropped by the users signal handlers when a user, its
+    groups or a group change, right away and again once the transaction
+    commits, so readers of the old rows can't cache them back after the
+    change is visible. Bulk updates skip signals and must call forget.
+
+    Entries can be stored with the version (ETag) of the user they were
+    built from, and are only answered for that version.
+    """
+
+    def __init__(self, cache=None, options=None):
+        options = {**users_api_settings(), **(options or {})}
+        self._cache = cache or build_cache(
+            options["RESPONSE_CACHE_BACKEND"],
+            max_entries=options["RESPONSE_CACHE_MAX_ENTRIES"],
+            alias=options["RESPONSE_CACHE_ALIAS"],
+            prefix="users:response:",
+        )
+        self.ttl = options["RESPONSE_CACHE_TTL"]
+
+    @property
+    def stats(self):
+        """Cache hit, miss and eviction counters"""
+        return self._cache.stats.as_dict()
+
+    @staticmethod
+    def _key(user_id, variant):
+        return f"{variant}:{user_id}"
+
+    def get(self, user_id, variant, version=None):
+        """
+        Return the cached response of a user or None, also when it was
+        built from another version than the given one
+        """
+        entry = self._cache.get(self._key(user_id, variant))
+        if entry is None:
+            return None
+        cached_version, data = entry
+        if version is not None and version != cached_version:
+            return None
+        return data
+
+    def set(self, user_id, variant, data, version=None):
+        """Cache the response of a user, built from its version"""
+        entry = (version, dict(data))
+        self._cache.set(self._key(user_id, variant), entry, self.ttl)
+
+    def _delete(self, user_ids):
+        for user_id in user_ids:
+            for variant in VARIANTS:
+                self._cache.delete(self._key(user_id, variant))
+
+    def forget(self, user_ids, using=None):
+        """Drop the cached responses of the users with user_ids"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        self._delete(user_ids)
+        transaction.on_commit(lambda: self._delete(user_ids), using=using)
+
+    def clear(self, using=None):
+        """Drop every cached response"""
+        self._cache.clear()
+        transaction.on_commit(self._cache.clear, using=using)
+
+
+user_responses = UserResponseCache()
@@ -0,0 +1,193 @@
+"""
+    Users search module
+
+    PostgreSQL uses pg_trgm GIN indexes on UPPER(column::text), the
+    expression Django compares icontains lookups on, and ranks by
+    trigram similarity. SQLite uses an FTS5 trigram table over the users
+    table, kept in sync by triggers. Other databases scan.
+"""
+import uuid
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+from .conf import users_api_settings
+from .models import User
+
+
+SEARCH_FIELDS = ("username", "first_name", "last_name", "email")
+MIN_QUERY_LENGTH = 3
+
+FTS_TABLE = "users_user_search"
+FTS_COLUMNS = ", ".join(SEARCH_FIELDS)
+FTS_NEW = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+FTS_OLD = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+
+SQLITE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    {FTS_COLUMNS},
+    content='users_user',
+    tokenize='trigram'
+)
+"""
+
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_insert": f"""
+CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON users_user BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+    VALUES (new.rowid, {FTS_NEW});
+END
+""",
+    f"{FTS_TABLE}_delete": f"""
+CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON users_user BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+    VALUES ('delete', old.rowid, {FTS_OLD});
+END
+""",
+    f"{FTS_TABLE}_update": f"""
+CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {FTS_COLUMNS}
+ON users_user BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+    VALUES ('delete', old.rowid, {FTS_OLD});
+    INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+    VALUES (new.rowid, {FTS_NEW});
+END
+""",
+}
+
+SQLITE_SEARCH = f"""
+SELECT users_user.id FROM (
+    SELECT rowid, rank FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH %s
+    LIMIT %s
+) AS candidates
+JOIN users_user ON users_user.rowid = candidates.rowid
+ORDER BY candidates.rank
+LIMIT %s
+"""
+
+POSTGRES_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS users_user_{field}_trgm_idx "
+    'ON users_user USING gin (UPPER("{field}"::text) gin_trgm_ops)'
+)
+
+
+def install_sqlite_search(conn):
+    """
+    Create the FTS5 table and its triggers when they are missing, and
+    index every user then. SQLite drops the triggers whenever Django
+    rebuilds the users table, so it runs after every migrate too.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'users_user'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        cursor.execute(SQLITE_TABLE)
+        if existing.issuperset(SQLITE_TRIGGERS):
+            return
+        for name, sql in SQLITE_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(sql)
+        rebuild_sqlite_search(conn)
+
+
+def sqlite_search_installed(conn):
+    """Check if the FTS5 table exists"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def uninstall_sqlite_search(conn):
+    """Drop the FTS5 table and its triggers"""
+    with conn.cursor() as cursor:
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def rebuild_sqlite_search(conn):
+    """
+    Index every user again. VACUUM can renumber the rowids of the users
+    table, which the FTS5 table refers to, so run it after a VACUUM.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def install_postgres_search(conn):
+    """Create pg_trgm and the trigram indexes, outside a transaction"""
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for field in SEARCH_FIELDS:
+            cursor.execute(POSTGRES_INDEX.format(field=field))
+
+
+def uninstall_postgres_search(conn):
+    """Drop the trigram indexes, pg_trgm is kept"""
+    with conn.cursor() as cursor:
+        for field in SEARCH_FIELDS:
+            cursor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS users_user_{field}_trgm_idx"
+            )
+
+
+def _contains(query):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__icontains": query})
+    return condition
+
+
+def _search_postgres(queryset, query, limit, candidates):
+    # pylint: disable=C0415
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    similarity = Greatest(
+        *(TrigramSimilarity(field, query) for field in SEARCH_FIELDS)
+    )
+    matches = User.objects.filter(_contains(query)).values("pk")
+    return list(
+        queryset.filter(pk__in=matches[:candidates])
+        .annotate(similarity=similarity)
+        .order_by("-similarity", "username")[:limit]
+    )
+
+
+def _search_sqlite(queryset, query, limit, candidates):
+    phrase = '"' + query.replace('"', '""') + '"'
+    with connection.cursor() as cursor:
+        cursor.execute(SQLITE_SEARCH, [phrase, candidates, limit])
+        pks = [uuid.UUID(row[0]) for row in cursor.fetchall()]
+    users = queryset.in_bulk(pks)
+    return [users[pk] for pk in pks if pk in users]
+
+
+def search_users(query, limit=20, queryset=None):
+    """
+    Users with `query` in their username, names or email, best matches
+    first. Queries need at least MIN_QUERY_LENGTH characters, the size
+    of a trigram.
+
+    Only the first USERS_API["SEARCH_CANDIDATES"] matches are ranked, so
+    broad queries like a mail domain cost the same as precise ones.
+    """
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(
+            f"Search queries need at least {MIN_QUERY_LENGTH} characters"
+        )
+    queryset = User.objects.all() if queryset is None else queryset
+    candidates = max(limit, users_api_settings()["SEARCH_CANDIDATES"])
+    if connection.vendor == "postgresql":
+        return _search_postgres(queryset, query, limit, candidates)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(queryset, query, limit, candidates)
+    return list(queryset.filter(_contains(query)).order_by("username")[:limit])
@@ -1,26 +1,109 @@
 """
     User serializer classes
 """
+from datetime import datetime, timedelta, timezone
 from django.contrib.auth.models import Group
 from django.contrib.auth import password_validation
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
-from rest_framework import serializers
-from .models import User
-from .subscription import subscription_service
+from django.db.models import Value
+from django.db.models.functions import Lower
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.relations import MANY_RELATION_KWARGS
+from . import hashing
+from .conf import subscription_settings
+from .groups import resolve_groups, write_with_groups
+from .models import (
+    User,
+    UserGroup,
+    SUBSCRIPTION_PENDING,
+    SUBSCRIPTION_UNKNOWN,
+)
+from .subscription import subscription_service, SubscriptionException
+from .tasks import schedule_subscription
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class SubscriptionServiceUnavailable(APIException):
+    """
+    Exception to answer when subscriptions can't be fetched
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Subscription service unavailable, try again later."
+    default_code = "subscription_unavailable"
+
+
+def fetch_subscription_status(uuid, fallback):
+    """Fetch the subscription status, applying the configured fallback"""
+    try:
+        return subscription_service.fetch_subscription(uuid)["subscription"]
+    except SubscriptionException as ex:
+        if fallback == SUBSCRIPTION_UNKNOWN:
+            return SUBSCRIPTION_UNKNOWN
+        raise SubscriptionServiceUnavailable() from ex
 
 
-class CreatableSlugRelatedField(serializers.SlugRelatedField):
+class CreatableGroupsField(serializers.ManyRelatedField):
     """
-    Class to allow related creation if it does not exist
+    Many related field resolving every group name at once
     """
 
     def to_internal_value(self, data):
-        params = {self.slug_field: data}
-        obj, _ = self.get_queryset().get_or_create(**params)
-        return obj
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        names = [self.child_relation.to_name(item) for item in data]
+        groups = resolve_groups(names)
+        return [groups[name] for name in dict.fromkeys(names)]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class CreatableGroupField(serializers.SlugRelatedField):
+    """
+    Group field by name, creating the groups that don't exist
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", Group.objects)
+        kwargs.setdefault("slug_field", "name")
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key, value in kwargs.items():
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = value
+        return CreatableGroupsField(**list_kwargs)
+
+    def to_name(self, data):
+        """Validate a group name"""
+        if not isinstance(data, str):
+            self.fail("invalid")
+        return data
+
+    def to_internal_value(self, data):
+        name = self.to_name(data)
+        return resolve_groups([name])[name]
+
+
+class SparseFieldsMixin:  # pylint: disable=R0903
+    """
+    Mixin to serialize only the `fields` given, all of them by default
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     User base serializer
     """
@@ -57,31 +140,85 @@ class UserDetailedSerializer(UserSerializer):
         )
 
 
+def email_exists(email, exclude_pk=None):
+    """
+    Check if an email is taken ignoring case, filtering exactly like
+    users_user_email_lower_idx so the lookup uses it
+    """
+    qset = (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower=Lower(Value(email)))
+        .exclude(email="")
+    )
+    if exclude_pk is not None:
+        qset = qset.exclude(pk=exclude_pk)
+    return qset.exists()
+
+
 class ValidateEmailSerializerMixin:  # pylint: disable=R0903
     """
     Mixin to validate if an email exists and it doesnt belong to the user
     """
 
     def validate_email(self, value):
-        """Validate email doesnt exist"""
+        """Validate email doesnt exist, ignoring case"""
+        if not value:
+            return value
         user = self.context["request"].user
-        qset = User.objects.exclude(pk=user.pk).filter(email=value)
-
-        if qset.exists():
+        if email_exists(value, exclude_pk=user.pk):
             raise serializers.ValidationError(
                 {"email": "E-mail already exists."}
             )
         return value
 
 
-class StaffUserUpdateSerializer(ValidateEmailSerializerMixin, UserSerializer):
+class HashPasswordSerializerMixin:
+    """
+    Mixin to store passwords hashed, through the hashing executor
+    """
+
+    @staticmethod
+    def _hash_password(validated_data):
+        if validated_data.get("password"):
+            validated_data["password"] = hashing.make_password(
+                validated_data["password"]
+            )
+
+    def create(self, validated_data, *args, **kwargs):
+        """Create with the password hashed"""
+        self._hash_password(validated_data)
+        return super().create(validated_data, *args, **kwargs)
+
+    def update(self, instance, validated_data, *args, **kwargs):
+        """Update with the password hashed"""
+        self._hash_password(validated_data)
+        return super().update(instance, validated_data, *args, **kwargs)
+
+
+class StaffUserUpdateSerializer(
+    ValidateEmailSerializerMixin,
+    HashPasswordSerializerMixin,
+    serializers.ModelSerializer,
+):
     """
     Serializer to update users by staff
     """
 
-    groups = CreatableSlugRelatedField(
-        queryset=Group.objects, many=True, slug_field="name"
-    )
+    groups = CreatableGroupField(many=True)
+
+    def update(self, instance, validated_data, *args, **kwargs):
+        """Update, retrying with groups deleted meanwhile resolved again"""
+        if "groups" not in validated_data:
+            return super().update(instance, validated_data, *args, **kwargs)
+
+        update = super().update
+
+        def write(groups):
+            # The password is hashed in place, every try gets a copy
+            data = {**validated_data, "groups": groups}
+            return update(instance, data, *args, **kwargs)
+
+        return write_with_groups(write, validated_data["groups"])
 
     class Meta:  # pylint: disable=C0115,R0903
         model = User
@@ -108,7 +245,9 @@ def validate_password_field(value, instance):
 
 
 class NonStaffUserUpdateSerializer(
-    ValidateEmailSerializerMixin, UserSerializer
+    ValidateEmailSerializerMixin,
+    HashPasswordSerializerMixin,
+    serializers.ModelSerializer,
 ):
     """
     Serializer to update users by non staff
@@ -132,7 +271,7 @@ class NonStaffUserUpdateSerializer(
         if self.instance.id != user.id:
             raise serializers.ValidationError("Invalid user id")
 
-        if not self.instance.check_password(old_password):
+        if not hashing.check_password(old_password, self.instance.password):
             raise serializers.ValidationError("Old password is incorrect")
         return super().update(instance, validated_data, *args, **kwargs)
 
@@ -145,16 +284,17 @@ class NonStaffUserUpdateSerializer(
         )
 
 
-class UserCreateSerializer(UserDetailedSerializer):
+class UserCreateSerializer(
+    HashPasswordSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer to create user
     """
 
+    subscription = serializers.CharField(read_only=True)
     password = serializers.CharField()
     repeat_password = serializers.CharField(write_only=True)
-    groups = CreatableSlugRelatedField(
-        queryset=Group.objects, many=True, slug_field="name"
-    )
+    groups = CreatableGroupField(many=True)
 
     def validate_password(self, value):
         """Validate with django builtin"""
@@ -166,17 +306,48 @@ class UserCreateSerializer(UserDetailedSerializer):
         if value != self.initial_data["password"]:
             raise serializers.ValidationError("Password doesn't match")
 
+    @staticmethod
+    def _insert(validated_data):
+        """
+        Insert the user and its groups, with a query each. The user
+        carries its group names, for UserCreatedSerializer to answer
+        without querying them back.
+        """
+        groups = validated_data.pop("groups", [])
+        user = User(**validated_data)
+
+        def insert(groups):
+            user.save(force_insert=True)
+            UserGroup.objects.bulk_create(
+                UserGroup(user_id=user.id, group_id=group.id)
+                for group in groups
+            )
+            return groups
+
+        groups = write_with_groups(insert, groups)
+        user.group_names = [group.name for group in groups]
+        return user
+
     def create(self, validated_data, *args, **kwargs):
         """User creation function"""
         validated_data.pop("repeat_password")
-
-        obj = super().create(validated_data, *args, **kwargs)
-        result = subscription_service.fetch_subscription(obj.id)
-
-        obj.subscription = result["subscription"]
-        obj.save()
-
-        return obj
+        self._hash_password(validated_data)
+        options = subscription_settings()
+
+        if options["MODE"] == "deferred":
+            validated_data["subscription"] = SUBSCRIPTION_PENDING
+            obj = self._insert(validated_data)
+            schedule_subscription(obj.id)
+            return obj
+
+        # The subscription is fetched before inserting, so a failing
+        # service doesn't leave a user behind
+        uuid = User._meta.pk.get_default()  # pylint: disable=E1101,W0212
+        validated_data["id"] = uuid
+        validated_data["subscription"] = fetch_subscription_status(
+            uuid, options["FALLBACK"]
+        )
+        return self._insert(validated_data)
 
     class Meta:  # pylint: disable=C0115,R0903
         model = User
@@ -184,3 +355,58 @@ class UserCreateSerializer(UserDetailedSerializer):
             "password",
             "repeat_password",
         )
+
+
+class UserCreatedSerializer(UserDetailedSerializer):
+    """
+    Detailed serializer of a user just created, reading the group names
+    returned by the creation
+    """
+
+    groups = serializers.ListField(
+        child=serializers.CharField(), source="group_names", read_only=True
+    )
+
+
+class UserBulkCreateItemSerializer(UserCreateSerializer):
+    """
+    Serializer to validate an item of a bulk creation, username
+    uniqueness and groups are resolved for the whole batch
+    """
+
+    groups = serializers.ListField(child=serializers.CharField(max_length=150))
+
+    class Meta(UserCreateSerializer.Meta):  # pylint: disable=C0115,R0903
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator()]}
+        }
+
+
+# pylint: disable=W0223
+class SubscriptionEventSerializer(serializers.Serializer):
+    """
+    Subscription change event, ordered by version or by timestamp
+    (converted to a version in microseconds). Both are stored as the
+    same version, so events carry the one WEBHOOK_ORDERING names.
+    """
+
+    id = serializers.UUIDField()
+    subscription = serializers.CharField(max_length=20)
+    version = serializers.IntegerField(min_value=0, required=False)
+    timestamp = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        ordering = subscription_settings()["WEBHOOK_ORDERING"]
+        other = "timestamp" if ordering == "version" else "version"
+        if other in attrs:
+            raise serializers.ValidationError(
+                {other: f"Events are ordered by {ordering}"}
+            )
+        if ordering not in attrs:
+            raise serializers.ValidationError(
+                {ordering: "This field is required."}
+            )
+        if ordering == "timestamp":
+            elapsed = attrs["timestamp"] - EPOCH
+            attrs["version"] = elapsed // timedelta(microseconds=1)
+        return attrs
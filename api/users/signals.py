@@ -0,0 +1,144 @@
+"""
+    Users app signal handlers
+"""
+from django.contrib.auth.models import Group
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+
+from .authentication import token_cache
+from .groups import group_cache
+from .models import User, UserGroup
+from .responses import user_responses
+from .search import install_sqlite_search, sqlite_search_installed
+
+
+@receiver(post_save, sender=Group, dispatch_uid="users.group_saved")
+@receiver(post_delete, sender=Group, dispatch_uid="users.group_deleted")
+def forget_groups(**kwargs):  # pylint: disable=W0613
+    """Drop cached group ids when a group is renamed or deleted"""
+    group_cache.clear()
+
+
+def _touch_members(users, using):
+    """
+    Bump the groups version and the update time of users, so their
+    ETags and Last-Modified follow their groups
+    """
+    now = timezone.now()
+    users.using(using).update(
+        groups_version=F("groups_version") + 1, updated=now
+    )
+    return now
+
+
+@receiver(m2m_changed, sender=UserGroup, dispatch_uid="users.groups_version")
+def touch_members(
+    instance, action, reverse, pk_set, using, **kwargs
+):  # pylint: disable=R0913,W0613
+    """Bump the groups version of users whose groups changed"""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            users = User.objects.filter(pk=instance.pk)
+            instance.updated = _touch_members(users, using)
+            instance.groups_version += 1
+    elif action in ("post_add", "post_remove") and pk_set:
+        _touch_members(User.objects.filter(pk__in=pk_set), using)
+    elif action == "pre_clear":
+        # Members are only known before they are cleared
+        _touch_members(User.objects.filter(groups=instance), using)
+
+
+@receiver(post_save, sender=Group, dispatch_uid="users.group_members")
+@receiver(pre_delete, sender=Group, dispatch_uid="users.group_members_del")
+def touch_group_members(
+    instance, using, created=False, **kwargs
+):  # pylint: disable=W0613
+    """Bump the groups version of members of a renamed or deleted group"""
+    if not created:
+        _touch_members(User.objects.filter(groups=instance), using)
+
+
+@receiver(post_save, sender=User, dispatch_uid="users.user_saved")
+@receiver(post_delete, sender=User, dispatch_uid="users.user_deleted")
+def forget_user_responses(
+    instance, using, created=False, **kwargs
+):  # pylint: disable=W0613
+    """Drop the cached responses of a changed or deleted user"""
+    if not created:
+        user_responses.forget([instance.pk], using=using)
+
+
+@receiver(m2m_changed, sender=UserGroup, dispatch_uid="users.user_groups")
+def forget_member_responses(
+    instance, action, reverse, pk_set, using, **kwargs
+):  # pylint: disable=R0913,W0613
+    """Drop the cached responses of users whose groups changed"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        user_responses.forget([instance.pk], using=using)
+    elif pk_set:
+        user_responses.forget(pk_set, using=using)
+    else:
+        # A group cleared of its members doesn't say which ones
+        user_responses.clear(using=using)
+
+
+@receiver(post_save, sender=Group, dispatch_uid="users.group_responses")
+@receiver(
+    post_delete, sender=Group, dispatch_uid="users.group_deleted_responses"
+)
+def forget_group_responses(
+    using, created=False, **kwargs
+):  # pylint: disable=W0613
+    """
+    Drop every cached response when a group is renamed or deleted, as
+    responses name their groups and deletions cascade without signals
+    """
+    if not created:
+        user_responses.clear(using=using)
+
+
+@receiver(post_save, sender=AccessToken, dispatch_uid="users.token_saved")
+@receiver(post_delete, sender=AccessToken, dispatch_uid="users.token_deleted")
+def forget_token(
+    instance, using, created=False, **kwargs
+):  # pylint: disable=W0613
+    """Drop a cached token when it's changed or revoked"""
+    if not created:
+        token_cache.forget(instance.token, using=using)
+
+
+@receiver(post_save, sender=User, dispatch_uid="users.user_tokens_saved")
+@receiver(post_delete, sender=User, dispatch_uid="users.user_tokens_deleted")
+def forget_user_tokens(
+    instance, using, created=False, **kwargs
+):  # pylint: disable=W0613
+    """Drop the cached tokens of a changed or deleted user, no queries"""
+    if not created:
+        token_cache.forget_user(instance.pk, using=using)
+
+
+@receiver(post_migrate, dispatch_uid="users.search_triggers")
+def restore_search_triggers(sender, using, **kwargs):  # pylint: disable=W0613
+    """
+    Bring back the search triggers on SQLite, which drops them whenever a
+    migration rebuilds the users table
+    """
+    conn = connections[using]
+    if (
+        sender.name == "users"
+        and conn.vendor == "sqlite"
+        and sqlite_search_installed(conn)
+    ):
+        install_sqlite_search(conn)
@@ -0,0 +1,86 @@
+"""
+    Single-flight module, to coalesce concurrent calls by key
+"""
+import asyncio
+import threading
+
+
+class _Call:  # pylint: disable=R0903
+    """
+    In-flight call, shared by the threads asking for the same key
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# pylint: disable=R0903
+class SingleFlight:
+    """
+    Runs a function once per key at a time, threads calling with a key
+    already in flight wait for that call and share its outcome
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key, func, *args, **kwargs):
+        """Call func, or wait for the in-flight call of key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio flavour of SingleFlight, coalescing coroutines of the same
+    event loop. Calls run as tasks, so cancelling a caller doesn't
+    cancel the call for the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.coalesced = 0
+
+    def _forget(self, call_key, task):
+        self._tasks.pop(call_key, None)
+        if not task.cancelled():
+            task.exception()  # flags the exception as retrieved
+
+    async def run(self, key, func, *args, **kwargs):
+        """Await func, or the in-flight call of key"""
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        task = self._tasks.get(call_key)
+        if task is None:
+            task = loop.create_task(func(*args, **kwargs))
+            self._tasks[call_key] = task
+            task.add_done_callback(lambda done: self._forget(call_key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
@@ -1,10 +1,31 @@
 """
     Subscription module
 """
+import asyncio
+import io
 import json
-import re
-import responses
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+from .breaker import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from .cache import build_cache
+from .conf import subscription_settings
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+
+# Client errors saying the subscription doesn't exist, cached
+NOT_FOUND_STATUSES = frozenset({404, 410})
+# Client errors saying the service is busy, failures like server errors
+TRANSIENT_STATUSES = frozenset({408, 429})
 
 
 class SubscriptionException(Exception):
@@ -13,67 +34,348 @@ class SubscriptionException(Exception):
     """
 
 
+class SubscriptionUnavailable(SubscriptionException):
+    """
+    Exception raised when calls are rejected without reaching the service
+    """
+
+
 def _mock_callback(request):
     """
     Response mock function
     """
-    uid = request.url.split("/")[-1]
-    resp_body = {"id": uid, "subscription": "active"}
+    ids = parse_qs(urlparse(request.url).query).get("ids")
+    if ids:
+        resp_body = {
+            "results": [
+                {"id": uid, "subscription": "active"}
+                for uid in ids[0].split(",")
+            ]
+        }
+    else:
+        uid = request.url.split("/")[-1]
+        resp_body = {"id": uid, "subscription": "active"}
 
     headers = {"Content-type": "application/json"}
 
     return (200, headers, json.dumps(resp_body))
 
 
-# pylint: disable=R0903
+class JitteredRetry(Retry):
+    """
+    Retry policy adding a random jitter to the exponential backoff,
+    so retries from many workers don't hit the service in lockstep
+    """
+
+    def __init__(self, *args, jitter=0.0, backoff_cap=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+        self.backoff_cap = backoff_cap
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.jitter = self.jitter
+        retry.backoff_cap = self.backoff_cap
+        return retry
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        backoff += random.uniform(0, self.jitter)
+        if self.backoff_cap is not None:
+            backoff = min(backoff, self.backoff_cap)
+        return backoff
+
+
+def build_adapter(options):
+    """Build the pooled HTTP adapter shared by every client session"""
+    retry = JitteredRetry(
+        total=options["RETRIES"],
+        connect=options["RETRIES"],
+        read=options["RETRIES"],
+        status=options["RETRIES"],
+        status_forcelist=options["RETRY_STATUSES"],
+        allowed_methods=frozenset({"GET"}),
+        backoff_factor=options["BACKOFF_FACTOR"],
+        raise_on_status=False,
+        jitter=options["BACKOFF_JITTER"],
+        backoff_cap=options["BACKOFF_MAX"],
+    )
+    return HTTPAdapter(
+        pool_connections=options["POOL_CONNECTIONS"],
+        pool_maxsize=options["POOL_MAXSIZE"],
+        pool_block=options["POOL_BLOCK"],
+        max_retries=retry,
+    )
+
+
 class SubscriptionClient:
     """
     API Subscription client class
+
+    Connections are kept alive in a pool shared by all threads, each
+    thread gets its own session mounted on that pool.
     """
 
-    BASE_API_URL = "https://subscriptions.fake.service.test/api/v1/"
+    def __init__(self, options=None):
+        options = {**subscription_settings(), **(options or {})}
+        self.base_url = options["BASE_API_URL"]
+        self.timeout = (options["CONNECT_TIMEOUT"], options["READ_TIMEOUT"])
+        self._adapter = build_adapter(options)
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """Session bound to the current thread"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
 
     def get(self, endpoint, params=None):
         """Get API function"""
-        return requests.get(
-            f"{self.BASE_API_URL}{endpoint}", params, timeout=60
+        return self.session.get(
+            f"{self.base_url}{endpoint}", params=params, timeout=self.timeout
         )
 
+    def get_batch(self, uuids):
+        """Get many users subscriptions in a single call"""
+        return self.get("users", {"ids": ",".join(str(u) for u in uuids)})
+
+    def close(self):
+        """Release pooled connections"""
+        self._adapter.close()
+
+
+class MockAdapter(BaseAdapter):
+    """
+    Transport adapter answering every request in process, through
+    _mock_callback. It keeps no state, so threads can share it.
+    """
+
+    def send(self, request, **kwargs):  # pylint: disable=W0221,W0613
+        status, headers, body = _mock_callback(request)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response.encoding = "utf-8"
+        response.raw = io.BytesIO(body.encode())
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
 
 # pylint: disable=R0903
 class SubscriptionClientMock(SubscriptionClient):
     """
-    Class to mock subscription client
+    Class to mock subscription client, its sessions are mounted on a
+    MockAdapter instead of the pooled one
     """
 
-    @responses.activate
-    def get(self, endpoint, params=None):
-        """GET API mock function"""
-        responses.add_callback(
-            responses.GET,
-            re.compile(
-                "https://subscriptions.fake.service.test/api/v1/users/*"
-            ),
-            callback=_mock_callback,
-            content_type="application/json",
-        )
-        return super().get(endpoint, params)
+    def __init__(self, options=None):
+        super().__init__(options)
+        self._adapter = MockAdapter()
 
 
+# pylint: disable=R0902
 class SubscriptionService:
     """
     Subscription service class
+
+    Results are cached by uuid during CACHE_TTL seconds. Unknown users
+    (404 or 410, or missing from a batch) are cached too, during
+    CACHE_NEGATIVE_TTL, other errors aren't. Timeouts and throttling
+    (408 or 429) are failures, like server errors.
+
+    Remote calls go through a circuit breaker, opened when the service
+    keeps failing, and a bulkhead capping the concurrent calls.
+    Concurrent lookups of the same uuid are coalesced in a single call.
+
+    Bulk lookups are split in batches of BATCH_SIZE uuids, fetching up
+    to BATCH_CONCURRENCY batches at once.
     """
 
-    def __init__(self, client=SubscriptionClient()):
-        self._client = client
+    def __init__(self, client=None, cache=None, options=None):
+        options = {**subscription_settings(), **(options or {})}
+        self._client = client or SubscriptionClient(options)
+        self._cache = cache or build_cache(
+            options["CACHE_BACKEND"],
+            max_entries=options["CACHE_MAX_ENTRIES"],
+            alias=options["CACHE_ALIAS"],
+            prefix="subscription:",
+        )
+        self.ttl = options["CACHE_TTL"]
+        self.negative_ttl = options["CACHE_NEGATIVE_TTL"]
+        self.batch_size = options["BATCH_SIZE"]
+        self.batch_concurrency = options["BATCH_CONCURRENCY"]
+        self.breaker = CircuitBreaker(
+            "subscription",
+            failure_threshold=options["BREAKER_FAILURES"],
+            recovery_timeout=options["BREAKER_RECOVERY"],
+            half_open_max_calls=options["BREAKER_HALF_OPEN_CALLS"],
+            exceptions=(SubscriptionException,),
+        )
+        self.bulkhead = Bulkhead(
+            "subscription",
+            max_concurrent=options["MAX_CONCURRENT"],
+            timeout=options["BULKHEAD_TIMEOUT"],
+        )
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+
+    @property
+    def cache_stats(self):
+        """Cache hit, miss and eviction counters"""
+        return self._cache.stats.as_dict()
+
+    @property
+    def stats(self):
+        """Cache, circuit breaker and bulkhead counters"""
+        return {
+            "cache": self.cache_stats,
+            "breaker": self.breaker.stats(),
+            "bulkhead": self.bulkhead.stats(),
+            "coalesced": self._flights.coalesced
+            + self._async_flights.coalesced,
+        }
+
+    def invalidate(self, uuid):
+        """Drop the cached subscription of uuid"""
+        self._cache.delete(str(uuid))
 
     def fetch_subscription(self, uuid):
         """Retrieve subscription by uuid"""
-        response = self._client.get(f"users/{uuid}")
+        key = str(uuid)
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._flights.run(key, self._guarded, self._fetch, key)
+        result = self._unwrap(entry)
+        if isinstance(result, SubscriptionException):
+            raise result
+        return result
+
+    def fetch_subscriptions(self, uuids, refresh=False):
+        """
+        Retrieve subscriptions of many uuids, mapped by uuid.
+        Failed lookups are mapped to their SubscriptionException.
+        With refresh, every uuid is fetched skipping the cached ones.
+        """
+        results = {}
+        missing = []
+        for key in dict.fromkeys(str(uuid) for uuid in uuids):
+            entry = None if refresh else self._cache.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                results[key] = self._unwrap(entry)
+
+        chunks = [
+            missing[i : i + self.batch_size]
+            for i in range(0, len(missing), self.batch_size)
+        ]
+        if len(chunks) > 1 and self.batch_concurrency > 1:
+            workers = min(self.batch_concurrency, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(self._fetch_chunk, chunks))
+        else:
+            fetched = [self._fetch_chunk(chunk) for chunk in chunks]
+
+        for chunk_results in fetched:
+            results.update(chunk_results)
+        return results
+
+    async def afetch_subscription(self, uuid):
+        """Retrieve subscription by uuid from asyncio code"""
+        key = str(uuid)
+        result = await self._async_flights.run(
+            key, asyncio.to_thread, self.fetch_subscription, key
+        )
+        return dict(result)
+
+    @staticmethod
+    def _unwrap(entry):
+        """Cached entry to result, or to exception for failed lookups"""
+        if "error" in entry:
+            return SubscriptionException(entry["error"])
+        return dict(entry["result"])
+
+    def _guarded(self, func, *args):
+        """Call through the circuit breaker and the bulkhead"""
+        try:
+            return self.breaker.call(self._in_bulkhead, func, *args)
+        except (CircuitOpenError, BulkheadFullError) as ex:
+            raise SubscriptionUnavailable(str(ex)) from ex
+
+    def _in_bulkhead(self, func, *args):
+        with self.bulkhead:
+            return func(*args)
+
+    def _get(self, func, *args):
+        """Call the client, wrapping network errors"""
+        try:
+            return func(*args)
+        except requests.RequestException as ex:
+            raise SubscriptionException(str(ex)) from ex
+
+    def _fetch_chunk(self, keys):
+        """Fetch a batch, mapping a failed call to every uuid of it"""
+        try:
+            entries = self._guarded(self._fetch_batch, keys)
+        except SubscriptionException as ex:
+            return {key: ex for key in keys}
+        return {key: self._unwrap(entry) for key, entry in entries.items()}
+
+    def _fetch_batch(self, keys):
+        """Call the batch endpoint and cache the outcome of every uuid"""
+        response = self._get(self._client.get_batch, keys)
+        status = response.status_code
         if not response.ok:
+            if status >= 500 or status in TRANSIENT_STATUSES:
+                raise SubscriptionException(response.text)
+            # Rejected batches aren't service failures, nor cached
+            return {key: {"error": response.text} for key in keys}
+
+        body = response.json()
+        # Ids missing from the results are unknown, cached like a 404
+        entries = {key: {"error": "Subscription not found"} for key in keys}
+        ttls = dict.fromkeys(keys, self.negative_ttl)
+        for key, error in body.get("errors", {}).items():
+            entries[key], ttls[key] = {"error": error}, 0
+        for result in body.get("results", []):
+            key = str(result["id"])
+            entries[key], ttls[key] = {"result": result}, self.ttl
+
+        for key, entry in entries.items():
+            if ttls[key]:
+                self._cache.set(key, entry, ttls[key])
+        return entries
+
+    def _fetch(self, key):
+        """Call the service and cache the outcome"""
+        response = self._get(self._client.get, f"users/{key}")
+
+        status = response.status_code
+        if response.ok:
+            entry, ttl = {"result": response.json()}, self.ttl
+        elif status in NOT_FOUND_STATUSES:
+            entry, ttl = {"error": response.text}, self.negative_ttl
+        elif status < 500 and status not in TRANSIENT_STATUSES:
+            entry, ttl = {"error": response.text}, 0
+        else:
             raise SubscriptionException(response.text)
-        return response.json()
+
+        if ttl:
+            self._cache.set(key, entry, ttl)
+        return entry
 
 
-subscription_service = SubscriptionService(SubscriptionClientMock())
+subscription_service = SubscriptionService(
+    SubscriptionClientMock() if subscription_settings()["MOCK"] else None
+)
@@ -0,0 +1,124 @@
+"""
+    Background tasks module
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .conf import subscription_settings
+from .models import User, SUBSCRIPTION_PENDING
+from .responses import user_responses
+from .subscription import subscription_service, SubscriptionException
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None  # pylint: disable=C0103
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process wide worker pool"""
+    global _executor  # pylint: disable=W0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=subscription_settings()["WORKERS"],
+                thread_name_prefix="subscription",
+            )
+    return _executor
+
+
+def resolve_subscription(user_id, retries=None, backoff=None):
+    """Fetch the subscription of a pending user and store it"""
+    options = subscription_settings()
+    retries = options["RESOLVE_RETRIES"] if retries is None else retries
+    backoff = options["RESOLVE_BACKOFF"] if backoff is None else backoff
+
+    for attempt in range(retries + 1):
+        try:
+            result = subscription_service.fetch_subscription(user_id)
+            break
+        except SubscriptionException as ex:
+            if attempt == retries:
+                logger.error("Subscription of %s unresolved: %s", user_id, ex)
+                return None
+            logger.warning("Subscription of %s failed: %s", user_id, ex)
+            time.sleep(backoff * 2**attempt)
+
+    User.objects.filter(pk=user_id, subscription=SUBSCRIPTION_PENDING).update(
+        subscription=result["subscription"], updated=timezone.now()
+    )
+    user_responses.forget([user_id])
+    return result["subscription"]
+
+
+def resolve_subscriptions(user_ids, retries=None, backoff=None):
+    """Fetch the subscriptions of many pending users and store them"""
+    options = subscription_settings()
+    retries = options["RESOLVE_RETRIES"] if retries is None else retries
+    backoff = options["RESOLVE_BACKOFF"] if backoff is None else backoff
+
+    remaining = [str(user_id) for user_id in user_ids]
+    resolved = defaultdict(list)
+    for attempt in range(retries + 1):
+        results = subscription_service.fetch_subscriptions(remaining)
+        remaining = []
+        for user_id, result in results.items():
+            if isinstance(result, SubscriptionException):
+                remaining.append(user_id)
+            else:
+                resolved[result["subscription"]].append(user_id)
+        if not remaining or attempt == retries:
+            break
+        logger.warning("Subscription of %s users failed", len(remaining))
+        time.sleep(backoff * 2**attempt)
+
+    if remaining:
+        logger.error("Subscription of %s users unresolved", len(remaining))
+    now = timezone.now()
+    for subscription, ids in resolved.items():
+        User.objects.filter(
+            pk__in=ids, subscription=SUBSCRIPTION_PENDING
+        ).update(subscription=subscription, updated=now)
+        user_responses.forget(ids)
+    return {
+        user_id: subscription
+        for subscription, ids in resolved.items()
+        for user_id in ids
+    }
+
+
+def _in_worker(func, arg):
+    """Run from a pool thread, releasing its db connections"""
+    try:
+        func(arg)
+    except Exception:  # pylint: disable=W0703
+        logger.exception("Subscription task %s crashed", func.__name__)
+    finally:
+        connections.close_all()
+
+
+def _schedule(func, arg):
+    """Run func once the current transaction commits"""
+    if subscription_settings()["EXECUTOR"] == "sync":
+        transaction.on_commit(lambda: func(arg))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(_in_worker, func, arg)
+        )
+
+
+def schedule_subscription(user_id):
+    """Resolve the subscription once the current transaction commits"""
+    _schedule(resolve_subscription, user_id)
+
+
+def schedule_subscriptions(user_ids):
+    """Resolve many subscriptions once the current transaction commits"""
+    _schedule(resolve_subscriptions, list(user_ids))
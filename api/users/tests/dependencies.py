@@ -1,6 +1,10 @@
 from oauth2_provider.models import Application
 import pytest
+from ..authentication import token_cache
+from ..fakeserver import FakeSubscriptionServer
+from ..groups import group_cache
 from ..models import User
+from ..responses import user_responses
 
 
 TEST_STAFF_USERNAME = "foo"
@@ -87,3 +91,31 @@ def create_user_payload(username, password, repassword, groups):
         "repeat_password": repassword,
         "groups": groups,
     }
+
+
+@pytest.fixture
+def fake_subscription_server():
+    server = FakeSubscriptionServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    user_responses.clear()
+    yield
+    user_responses.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_group_cache():
+    group_cache.clear()
+    yield
+    group_cache.clear()
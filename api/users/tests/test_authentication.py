@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..authentication import (
+    CachedOAuth2Authentication,
+    token_cache,
+    token_key,
+)
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    empty_token_cache,
+    TEST_NONSTAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+def _authenticate(token):
+    request = APIRequestFactory().get(
+        ENDPOINT_USER, HTTP_AUTHORIZATION=f"Bearer {token}"
+    )
+    return CachedOAuth2Authentication().authenticate(Request(request))
+
+
+@pytest.mark.django_db
+def test_cached_token_without_queries(
+    as_non_staff_token, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        user, access_token = _authenticate(as_non_staff_token)
+    assert user.username == TEST_NONSTAFF_USERNAME
+
+    with django_assert_num_queries(0):
+        cached_user, cached_token = _authenticate(as_non_staff_token)
+
+    assert cached_user.pk == user.pk
+    assert cached_token.pk == access_token.pk
+    assert cached_user is not user, "Requests get their own copies"
+
+
+@pytest.mark.django_db
+def test_revoked_token_forgotten(as_non_staff_token):
+    assert _authenticate(as_non_staff_token) is not None
+
+    AccessToken.objects.get(token=as_non_staff_token).revoke()
+
+    assert _authenticate(as_non_staff_token) is None
+
+
+@pytest.mark.django_db
+def test_tokens_forgotten_on_user_change(
+    as_non_staff_token, django_assert_num_queries
+):
+    user, _ = _authenticate(as_non_staff_token)
+    user = User.objects.get(pk=user.pk)
+
+    user.is_staff = True
+    with django_assert_num_queries(1):
+        user.save()
+
+    user, _ = _authenticate(as_non_staff_token)
+    assert user.is_staff
+
+    user.is_active = False
+    user.save()
+
+    user, _ = _authenticate(as_non_staff_token)
+    assert not user.is_active
+
+
+@pytest.mark.django_db(transaction=True)
+def test_tokens_forgotten_on_commit(as_non_staff_token):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    with transaction.atomic():
+        user.is_staff = True
+        user.save()
+        # Readers of the old row until the commit, like other requests
+        token_cache.set(AccessToken.objects.get(token=as_non_staff_token))
+        assert token_cache.get(as_non_staff_token) is not None
+
+    assert token_cache.get(as_non_staff_token) is None
+
+
+@pytest.mark.django_db
+def test_token_cached_until_expiry(as_non_staff_token):
+    access_token = AccessToken.objects.get(token=as_non_staff_token)
+    access_token.expires = timezone.now() + timedelta(milliseconds=500)
+    access_token.save()
+
+    _authenticate(as_non_staff_token)
+    assert token_cache.get(as_non_staff_token) is None, "Expiring soon"
+
+    access_token.expires = timezone.now() + timedelta(hours=1)
+    access_token.save()
+    _authenticate(as_non_staff_token)
+    key = token_key(as_non_staff_token)
+    stamp, cached = token_cache._cache.get(key)  # pylint: disable=W0212
+
+    cached.expires = timezone.now()
+    token_cache._cache.set(key, (stamp, cached), 60)  # pylint: disable=W0212
+    assert token_cache.get(as_non_staff_token) is None, "Expired tokens"
+
+
+@pytest.mark.django_db
+def test_invalid_token_not_cached(create_app, client):
+    hits = token_cache.stats["hits"]
+
+    assert _authenticate("invalid") is None
+    assert _authenticate("invalid") is None
+
+    assert token_cache.stats["hits"] == hits
+
+
+@pytest.mark.django_db
+def test_api_requests_use_cached_tokens(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    url = f"{ENDPOINT_USER}{user.id}/"
+    hits = token_cache.stats["hits"]
+
+    for _ in range(3):
+        response = client.get(url, AUTHORIZATION=f"Bearer {as_staff_token}")
+        assert response.status_code == 200
+
+    assert token_cache.stats["hits"] == hits + 2
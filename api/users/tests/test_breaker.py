@@ -0,0 +1,80 @@
+from unittest import mock
+
+import pytest
+
+from ..breaker import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+)
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 1)
+
+    stats = breaker.stats()
+    assert stats["rejections"] == 1
+    assert stats["transitions"] == {"closed->open": 1}
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+    with mock.patch("users.breaker.time.monotonic", return_value=100):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+
+    with mock.patch("users.breaker.time.monotonic", return_value=111):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+        assert breaker.state == OPEN, "Failed probe opens it again"
+
+    with mock.patch("users.breaker.time.monotonic", return_value=122):
+        assert breaker.call(lambda: 1) == 1
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["transitions"] == {
+        "closed->open": 1,
+        "open->half_open": 2,
+        "half_open->open": 1,
+        "half_open->closed": 1,
+    }
+
+
+def test_breaker_ignores_other_exceptions():
+    breaker = CircuitBreaker(
+        "test", failure_threshold=1, exceptions=(KeyError,)
+    )
+
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+
+    assert breaker.state == CLOSED
+
+
+def test_bulkhead_rejects_when_full():
+    bulkhead = Bulkhead("test", max_concurrent=1)
+
+    with bulkhead:
+        with pytest.raises(BulkheadFullError):
+            with bulkhead:
+                pass
+
+    with bulkhead:
+        pass
+    assert bulkhead.stats()["rejections"] == 1
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from django.contrib.auth.models import Group
+from django.test import override_settings
+
+from ..models import User
+from ..subscription import subscription_service
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    create_user_payload,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_BULK = "/api/v1/users/bulk/"
+
+
+def _post(client, token, body, content_type="application/json"):
+    return client.post(
+        ENDPOINT_BULK,
+        data=body,
+        content_type=content_type,
+        AUTHORIZATION=f"Bearer {token}",
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_create_as_non_staff(as_non_staff_token, client):
+    payload = [create_user_payload("foo7", "p121212Ab", "p121212Ab", [])]
+
+    response = _post(client, as_non_staff_token, payload)
+
+    assert response.status_code == 403, "Staff user required"
+
+
+@pytest.mark.django_db
+def test_bulk_create_users(as_staff_token, client):
+    Group.objects.create(name="sales")
+    payload = [
+        create_user_payload(f"bulk{i}", "p121212Ab", "p121212Ab", groups)
+        for i, groups in enumerate(
+            [["sales"], ["sales", "support"], ["support"], []]
+        )
+    ]
+
+    response = _post(client, as_staff_token, payload)
+
+    assert response.status_code == 201
+    results = response.json()
+    assert [result["status"] for result in results] == [201] * 4
+    user = User.objects.get(username="bulk1")
+    assert str(user.id) == results[1]["id"]
+    assert user.subscription == "active"
+    assert user.check_password("p121212Ab"), "Passwords must be hashed"
+    assert set(user.groups.values_list("name", flat=True)) == {
+        "sales",
+        "support",
+    }
+    assert Group.objects.count() == 2
+
+
+@pytest.mark.django_db
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+)
+def test_bulk_create_more_than_a_batch(as_staff_token, client):
+    count = subscription_service.batch_size * 2 + 1
+    payload = [
+        create_user_payload(f"bulk{i}", "p121212Ab", "p121212Ab", [])
+        for i in range(count)
+    ]
+
+    response = _post(client, as_staff_token, payload)
+
+    assert response.status_code == 201, "Subscriptions of many batches"
+    assert [result["status"] for result in response.json()] == [201] * count
+    assert (
+        User.objects.filter(
+            username__startswith="bulk", subscription="active"
+        ).count()
+        == count
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_create_partial_failure(as_staff_token, client):
+    payload = [
+        create_user_payload("bulk1", "p121212Ab", "p121212Ab", []),
+        create_user_payload("bulk1", "p121212Ab", "p121212Ab", []),
+        create_user_payload(TEST_STAFF_USERNAME, "p121212Ab", "p121212Ab", []),
+        create_user_payload("bulk2", "p121212Ab", "other", []),
+        "not an user",
+    ]
+
+    response = _post(client, as_staff_token, payload)
+
+    assert response.status_code == 207
+    results = response.json()
+    assert [result["status"] for result in results] == [
+        201,
+        400,
+        400,
+        400,
+        400,
+    ]
+    assert "username" in results[1]["errors"], "Repeated in the batch"
+    assert "username" in results[2]["errors"], "Already taken"
+    assert "repeat_password" in results[3]["errors"]
+    assert User.objects.filter(username__startswith="bulk").count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_create_ndjson(
+    as_staff_token, client, django_assert_max_num_queries
+):
+    body = "\n".join(
+        json.dumps(
+            create_user_payload(f"bulk{i}", "p121212Ab", "p121212Ab", ["a"])
+        )
+        for i in range(20)
+    )
+
+    # auth, usernames, groups and the inserts, whatever the batch size
+    with django_assert_max_num_queries(12):
+        response = _post(client, as_staff_token, body, "application/x-ndjson")
+
+    assert response.status_code == 201
+    assert User.objects.filter(groups__name="a").count() == 20
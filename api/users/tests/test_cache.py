@@ -0,0 +1,43 @@
+from unittest import mock
+
+from ..cache import DjangoCacheBackend, LRUCacheBackend, build_cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCacheBackend(max_entries=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+
+    assert cache.get("b") is None, "Least recently used must be evicted"
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.as_dict() == {"hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_lru_expires_entries():
+    cache = LRUCacheBackend()
+    with mock.patch("users.cache.time.monotonic", return_value=100):
+        cache.set("a", 1, 10)
+    with mock.patch("users.cache.time.monotonic", return_value=111):
+        assert cache.get("a") is None, "Entry must expire after ttl"
+    assert len(cache) == 0
+
+
+def test_django_backend_clear_is_namespaced():
+    cache = DjangoCacheBackend(prefix="test:")
+    other = DjangoCacheBackend(prefix="other:")
+    cache.set("a", 1, 60)
+    other.set("a", 2, 60)
+
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert other.get("a") == 2, "Clear must not drop other namespaces"
+
+
+def test_build_cache_none():
+    cache = build_cache("none")
+    cache.set("a", 1, 60)
+    assert cache.get("a") is None
@@ -0,0 +1,111 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    empty_response_cache,
+    TEST_NONSTAFF_USERNAME,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+def _retrieve(client, token, user, **headers):
+    return client.get(
+        f"{ENDPOINT_USER}{user.id}/",
+        AUTHORIZATION=f"Bearer {token}",
+        **headers,
+    )
+
+
+@pytest.mark.django_db
+def test_retrieve_not_modified(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    response = _retrieve(client, as_staff_token, user)
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = _retrieve(
+            client, as_staff_token, user, HTTP_IF_NONE_MATCH=etag
+        )
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert not response.content
+    sqls = [query["sql"] for query in context.captured_queries]
+    assert not any("auth_group" in sql for sql in sqls), "No groups join"
+    narrow = 'SELECT "users_user"."updated", "users_user"."groups_version"'
+    assert len([sql for sql in sqls if sql.startswith(narrow)]) == 1
+    assert not any(sql.startswith('SELECT "users_user"."id"') for sql in sqls)
+
+
+@pytest.mark.django_db
+def test_retrieve_if_modified_since(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    response = _retrieve(client, as_staff_token, user)
+
+    response = _retrieve(
+        client,
+        as_staff_token,
+        user,
+        HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+    )
+
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_retrieve_etag_per_variant(as_staff_token, as_non_staff_token, client):
+    user = User.objects.get(username=TEST_STAFF_USERNAME)
+    basic = _retrieve(client, as_non_staff_token, user)
+    detailed = _retrieve(client, as_staff_token, user)
+
+    assert basic["ETag"] != detailed["ETag"]
+    response = _retrieve(
+        client, as_non_staff_token, user, HTTP_IF_NONE_MATCH=detailed["ETag"]
+    )
+    assert response.status_code == 200
+    assert "email" not in response.json()
+
+
+@pytest.mark.django_db
+def test_retrieve_etag_follows_groups(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    sales = Group.objects.create(name="sales")
+    etags = [_retrieve(client, as_staff_token, user)["ETag"]]
+
+    user.groups.add(sales)
+    etags.append(_retrieve(client, as_staff_token, user)["ETag"])
+
+    sales.name = "marketing"
+    sales.save()
+    etags.append(_retrieve(client, as_staff_token, user)["ETag"])
+
+    sales.user_set.clear()
+    response = _retrieve(
+        client, as_staff_token, user, HTTP_IF_NONE_MATCH=etags[-1]
+    )
+    assert response.status_code == 200
+    assert response.json()["groups"] == []
+    etags.append(response["ETag"])
+
+    assert len(set(etags)) == len(etags), "Every change must change the ETag"
+
+
+@pytest.mark.django_db
+def test_retrieve_missing_user(as_staff_token, client):
+    user = User(id="00000000-0000-7000-8000-000000000000")
+
+    response = _retrieve(client, as_staff_token, user)
+
+    assert response.status_code == 404
@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from django.test import override_settings
+
+from ..models import User
+
+
+ENDPOINT_EVENTS = "/api/v1/subscriptions/events/"
+SECRET = "webhook-secret"
+
+
+def _post(client, body, content_type="application/json", secret=SECRET):
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        ENDPOINT_EVENTS,
+        data=body,
+        content_type=content_type,
+        HTTP_X_SUBSCRIPTION_SIGNATURE=f"sha256={digest}",
+    )
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create(
+            username=f"user{i}", subscription="active", subscription_version=5
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+@override_settings(SUBSCRIPTION_SERVICE={"WEBHOOK_SECRET": SECRET})
+def test_events_bad_signature(client, users):
+    body = json.dumps([]).encode()
+
+    response = _post(client, body, secret="other")
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+@override_settings(SUBSCRIPTION_SERVICE={"WEBHOOK_SECRET": SECRET})
+def test_events_applied_in_bulk(client, users, django_assert_num_queries):
+    events = [
+        {"id": str(users[0].id), "subscription": "old", "version": 6},
+        {"id": str(users[0].id), "subscription": "expired", "version": 7},
+        {"id": str(users[1].id), "subscription": "stale", "version": 5},
+        {"id": str(users[2].id), "subscription": "paused", "version": 9},
+        {"id": "6f1f4a4e-8d4f-4a8d-9c67-2c3f1b0e9d11", "subscription": "x"},
+    ]
+    events[-1]["version"] = 1
+
+    # select and bulk update, plus the transaction savepoints
+    with django_assert_num_queries(4):
+        response = _post(client, json.dumps({"events": events}).encode())
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "received": 5,
+        "duplicates": 1,
+        "applied": 2,
+        "stale": 1,
+        "unknown": 1,
+    }
+    subscriptions = dict(User.objects.values_list("username", "subscription"))
+    assert subscriptions == {
+        "user0": "expired",
+        "user1": "active",
+        "user2": "paused",
+    }
+
+
+@pytest.mark.django_db
+@override_settings(
+    SUBSCRIPTION_SERVICE={
+        "WEBHOOK_SECRET": SECRET,
+        "WEBHOOK_ORDERING": "timestamp",
+    }
+)
+def test_events_ndjson_with_timestamps(client, users):
+    body = "\n".join(
+        json.dumps(event)
+        for event in [
+            {
+                "id": str(users[0].id),
+                "subscription": "expired",
+                "timestamp": "2023-03-01T10:00:00Z",
+            },
+            {"id": str(users[1].id), "subscription": "expired"},
+        ]
+    ).encode()
+
+    response = _post(client, body, content_type="application/x-ndjson")
+    assert response.status_code == 400, "Timestamp required"
+
+    response = _post(client, body.split(b"\n")[0], "application/x-ndjson")
+    assert response.status_code == 200
+    users[0].refresh_from_db()
+    assert users[0].subscription == "expired"
+    assert users[0].subscription_version == 1677664800000000
+
+
+@pytest.mark.django_db
+@override_settings(SUBSCRIPTION_SERVICE={"WEBHOOK_SECRET": SECRET})
+def test_events_ordered_by_one_scheme(client, users):
+    event = {
+        "id": str(users[0].id),
+        "subscription": "expired",
+        "timestamp": "2023-03-01T10:00:00Z",
+    }
+
+    response = _post(client, json.dumps([event]).encode())
+    assert response.status_code == 400, "Events are ordered by version"
+
+    event["version"] = 6
+    response = _post(client, json.dumps([event]).encode())
+    assert response.status_code == 400, "One ordering scheme per event"
+
+    del event["timestamp"]
+    response = _post(client, json.dumps([event]).encode())
+    assert response.status_code == 200
+    users[0].refresh_from_db()
+    assert users[0].subscription_version == 6
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+
+from ..export import export_users
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_EXPORT = "/api/v1/users/export/"
+
+
+def _export(client, token, **params):
+    return client.get(
+        ENDPOINT_EXPORT, data=params, AUTHORIZATION=f"Bearer {token}"
+    )
+
+
+@pytest.fixture
+def exported_users():
+    sales = Group.objects.create(name="sales")
+    for number in range(3):
+        user = User.objects.create(
+            username=f"exported{number}",
+            subscription="inactive" if number else "active",
+        )
+        user.groups.add(sales)
+
+
+@pytest.mark.django_db
+def test_export_as_non_staff(as_non_staff_token, client):
+    response = _export(client, as_non_staff_token)
+
+    assert response.status_code == 403, "Staff user required"
+
+
+@pytest.mark.django_db
+def test_export_ndjson(as_staff_token, client, exported_users):
+    response = _export(client, as_staff_token)
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    users = {user["username"]: user for user in map(json.loads, lines)}
+    assert len(users) == User.objects.count()
+    assert users["exported0"]["groups"] == ["sales"]
+    assert users["exported0"]["created"].endswith("Z")
+    assert users[TEST_STAFF_USERNAME]["is_staff"] is True
+    assert all("password" not in user for user in users.values())
+
+
+@pytest.mark.django_db
+def test_export_csv_filtered(as_staff_token, client, exported_users):
+    response = _export(
+        client, as_staff_token, output="csv", subscription="inactive"
+    )
+
+    assert response.status_code == 200
+    content = b"".join(response.streaming_content).decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert {row["username"] for row in rows} == {"exported1", "exported2"}
+    assert rows[0]["groups"] == "sales"
+    assert "password" not in rows[0]
+
+
+@pytest.mark.django_db
+def test_export_invalid_output(as_staff_token, client):
+    response = _export(client, as_staff_token, output="xml")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_export_queries_per_chunk(exported_users, django_assert_num_queries):
+    User.objects.create(username="exported3", subscription="active")
+
+    # One query for the users, and one for the groups of each chunk
+    with django_assert_num_queries(3):
+        pieces = list(export_users("ndjson", chunk_size=2))
+
+    assert len(pieces) == 2
+    assert sum(piece.count("\n") for piece in pieces) == 4
+
+
+@pytest.mark.django_db
+def test_export_command(exported_users):
+    out = io.StringIO()
+
+    call_command("export_users", "--format", "csv", stdout=out)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert len(rows) == 3
@@ -0,0 +1,87 @@
+import pytest
+
+from ..fakeserver import FakeSubscriptionServer, Latency
+from ..subscription import (
+    SubscriptionException,
+    SubscriptionService,
+    SubscriptionUnavailable,
+)
+from .dependencies import fake_subscription_server
+
+
+def _service(server, **options):
+    options = {
+        "BASE_API_URL": server.base_url,
+        "CACHE_BACKEND": "none",
+        "RETRIES": 0,
+        **options,
+    }
+    return SubscriptionService(options=options)
+
+
+def test_fake_server_keep_alive(fake_subscription_server):
+    service = _service(fake_subscription_server)
+
+    for uid in range(5):
+        assert service.fetch_subscription(uid)["subscription"] == "active"
+    results = service.fetch_subscriptions(["a", "b"])
+
+    assert results["a"]["subscription"] == "active"
+    assert fake_subscription_server.counters["requests"] == 6
+    assert (
+        fake_subscription_server.counters["connections"] == 1
+    ), "Connections must be reused"
+
+
+def test_fake_server_errors_open_breaker(fake_subscription_server):
+    fake_subscription_server.error_rate = 1
+    service = _service(fake_subscription_server, BREAKER_FAILURES=2)
+
+    for uid in range(2):
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(uid)
+    with pytest.raises(SubscriptionUnavailable):
+        service.fetch_subscription(3)
+
+    assert fake_subscription_server.counters["errors"] == 2
+
+
+def test_fake_server_retries(fake_subscription_server):
+    fake_subscription_server.error_rate = 1
+    service = _service(fake_subscription_server, RETRIES=2, BACKOFF_FACTOR=0)
+
+    with pytest.raises(SubscriptionException):
+        service.fetch_subscription(1)
+
+    assert fake_subscription_server.counters["requests"] == 3
+
+
+def test_fake_server_read_timeout(fake_subscription_server):
+    fake_subscription_server.stall_rate = 1
+    fake_subscription_server.stall = 0.5
+    service = _service(fake_subscription_server, READ_TIMEOUT=0.1)
+
+    with pytest.raises(SubscriptionException):
+        service.fetch_subscription(1)
+
+
+def test_fake_server_throttling():
+    server = FakeSubscriptionServer(rate=1).start()
+    try:
+        service = _service(server)
+        service.fetch_subscription(1)
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(2)
+    finally:
+        server.stop()
+
+    assert server.counters["throttled"] == 1
+
+
+def test_latency_distributions():
+    assert Latency("fixed:0.5").sample() == 0.5
+    assert 0.1 <= Latency("uniform:0.1,0.2").sample() <= 0.2
+    assert Latency("exponential:0.1").sample() >= 0
+    assert Latency("lognormal:0.1,0.5").sample() > 0
+    with pytest.raises(ValueError):
+        Latency("normal:1")
@@ -0,0 +1,119 @@
+import datetime
+from itertools import combinations
+
+import pytest
+from django.contrib.auth.models import Group
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ..fastpath import CompiledSerializer, compiled_serializer
+from ..models import User
+from ..serializers import UserDetailedSerializer, UserSerializer
+
+
+SERIALIZERS = (UserSerializer, UserDetailedSerializer)
+
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def users():
+    sales = Group.objects.create(name="sales")
+    support = Group.objects.create(name="support")
+    complete = User.objects.create(
+        username="jdoe",
+        first_name="John",
+        last_name="Doe",
+        email="jdoe@ine.com",
+        password="pbkdf2_sha256$1$salt$hash",
+        subscription="active",
+    )
+    complete.groups.add(sales, support)
+    blank = User.objects.create(username="blank", subscription="")
+    # Whole seconds are rendered without microseconds
+    User.objects.filter(pk=blank.pk).update(
+        updated=datetime.datetime(2023, 3, 1, 12, tzinfo=datetime.timezone.utc)
+    )
+    return list(User.objects.prefetch_related("groups").order_by("username"))
+
+
+def _rows(fields):
+    columns = [name for name in fields if name != "groups"] + ["id"]
+    rows = list(User.objects.order_by("username").values(*columns))
+    for row in rows:
+        if "groups" in fields:
+            user = User.objects.get(pk=row["id"])
+            row["groups"] = [group.name for group in user.groups.all()]
+    return rows
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("serializer_class", SERIALIZERS)
+def test_same_output_from_instances(users, serializer_class):
+    compiled = CompiledSerializer(serializer_class)
+
+    for user in users:
+        assert _render(compiled(user)) == _render(serializer_class(user).data)
+    assert _render(compiled.many(users)) == _render(
+        serializer_class(users, many=True).data
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("serializer_class", SERIALIZERS)
+def test_same_output_from_rows(users, serializer_class):
+    fields = serializer_class.Meta.fields
+    compiled = CompiledSerializer(serializer_class)
+
+    assert _render(compiled.many(_rows(fields))) == _render(
+        serializer_class(users, many=True).data
+    )
+
+
+@pytest.mark.django_db
+def test_same_output_for_sparse_fields(users):
+    all_fields = UserDetailedSerializer.Meta.fields
+    for size in (1, 2, 3):
+        for fields in combinations(all_fields, size):
+            compiled = compiled_serializer(UserDetailedSerializer, fields)
+            expected = _render(
+                UserDetailedSerializer(users, many=True, fields=fields).data
+            )
+            assert _render(compiled.many(users)) == expected, fields
+            assert _render(compiled.many(_rows(fields))) == expected, fields
+
+
+@pytest.mark.django_db
+def test_same_output_in_other_timezone(users):
+    compiled = CompiledSerializer(UserDetailedSerializer)
+
+    with timezone.override("America/Argentina/Buenos_Aires"):
+        data = compiled.many(users)
+        assert _render(data) == _render(
+            UserDetailedSerializer(users, many=True).data
+        )
+    assert data[0]["updated"].endswith("-03:00")
+
+
+@pytest.mark.django_db
+def test_same_output_without_prefetch(users):
+    compiled = CompiledSerializer(UserDetailedSerializer)
+    user = User.objects.get(username="jdoe")
+
+    assert compiled(user)["groups"] == ["sales", "support"]
+    assert _render(compiled(user)) == _render(
+        UserDetailedSerializer(user).data
+    )
+
+
+def test_compiled_once():
+    fields = ["id", "username"]
+
+    assert compiled_serializer(UserSerializer, fields) is compiled_serializer(
+        UserSerializer, tuple(fields)
+    )
+    assert compiled_serializer(UserSerializer) is not compiled_serializer(
+        UserDetailedSerializer
+    )
@@ -0,0 +1,172 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    empty_response_cache,
+    TEST_NONSTAFF_USERNAME,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+def _get(client, token, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(
+            url, data=params, AUTHORIZATION=f"Bearer {token}"
+        )
+    return response, [query["sql"] for query in context.captured_queries]
+
+
+def _reads_users(sqls):
+    return [
+        sql
+        for sql in sqls
+        if sql.startswith('SELECT "users_user".')
+        and '"users_user"."created"' in sql
+    ]
+
+
+@pytest.mark.django_db
+def test_retrieve_sparse_fields(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    response, sqls = _get(
+        client,
+        as_staff_token,
+        f"{ENDPOINT_USER}{user.id}/",
+        fields="username,id,subscription",
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": str(user.id),
+        "username": user.username,
+        "subscription": user.subscription,
+    }
+    assert not any("auth_group" in sql for sql in sqls), "No groups join"
+    (read,) = _reads_users(sqls)
+    assert '"users_user"."password"' not in read
+    assert '"users_user"."email"' not in read
+
+
+@pytest.mark.django_db
+def test_retrieve_sparse_fields_from_cache(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    url = f"{ENDPOINT_USER}{user.id}/"
+    full, _ = _get(client, as_staff_token, url)
+
+    sparse, sqls = _get(client, as_staff_token, url, fields="email")
+
+    assert sparse.json() == {"email": user.email}
+    assert not _reads_users(sqls), "Projected from the cached response"
+    assert sparse["ETag"] != full["ETag"]
+
+    response = client.get(
+        url,
+        data={"fields": "username"},
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+        HTTP_IF_NONE_MATCH=sparse["ETag"],
+    )
+    assert response.status_code == 200, "ETags depend on the fields"
+
+
+@pytest.mark.django_db
+def test_retrieve_sparse_fields_of_variant(as_non_staff_token, client):
+    user = User.objects.get(username=TEST_STAFF_USERNAME)
+
+    response, _ = _get(
+        client,
+        as_non_staff_token,
+        f"{ENDPOINT_USER}{user.id}/",
+        fields="username,email,password",
+    )
+
+    assert response.json() == {"username": user.username}
+
+
+@pytest.mark.django_db
+def test_unknown_fields(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    response, _ = _get(
+        client,
+        as_staff_token,
+        f"{ENDPOINT_USER}{user.id}/",
+        fields="username,secret",
+    )
+
+    assert response.status_code == 400
+    assert "secret" in response.json()["fields"]
+
+
+@pytest.mark.django_db
+def test_list_sparse_fields(as_staff_token, client):
+    response, sqls = _get(
+        client, as_staff_token, ENDPOINT_USER, fields="username"
+    )
+
+    assert response.status_code == 200
+    assert sorted(response.json()["results"], key=str) == [
+        {"username": TEST_NONSTAFF_USERNAME},
+        {"username": TEST_STAFF_USERNAME},
+    ]
+    assert not any("auth_group" in sql for sql in sqls), "No groups join"
+
+
+@pytest.mark.django_db
+def test_multi_get_sparse_fields(as_staff_token, client):
+    users = User.objects.order_by("username")
+
+    response, sqls = _get(
+        client,
+        as_staff_token,
+        f"{ENDPOINT_USER}multi/",
+        ids=",".join(str(user.id) for user in users),
+        fields="id,groups",
+    )
+
+    assert response.json()["results"] == [
+        {"id": str(user.id), "groups": []} for user in users
+    ]
+    (read,) = _reads_users(sqls)
+    assert '"users_user"."username"' not in read
+
+
+@pytest.mark.django_db
+def test_update_sparse_fields(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/?fields=id,last_name",
+        data={"last_name": "renamed"},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"id": str(user.id), "last_name": "renamed"}
+
+
+@pytest.mark.django_db
+def test_update_unknown_fields_not_applied(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/?fields=bogus",
+        data={"last_name": "renamed"},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+
+    assert response.status_code == 400
+    user.refresh_from_db()
+    assert user.last_name != "renamed", "Nothing is written"
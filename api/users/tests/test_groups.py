@@ -0,0 +1,147 @@
+import pytest
+from django.contrib.auth.models import Group
+from rest_framework.exceptions import ValidationError
+
+from ..groups import group_cache, resolve_groups
+from ..models import User
+from ..serializers import UserCreateSerializer
+from .dependencies import (
+    as_staff,
+    as_staff_token,
+    create_app,
+    create_user_payload,
+    empty_group_cache,
+    TEST_NONSTAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+@pytest.mark.django_db
+def test_resolve_groups_creates_missing_at_once(django_assert_num_queries):
+    sales = Group.objects.create(name="sales")
+    names = ["sales"] + [f"team{i}" for i in range(30)]
+
+    with django_assert_num_queries(3):
+        groups = resolve_groups(names)
+
+    assert groups["sales"].id == sales.id
+    assert set(groups) == set(names)
+    assert Group.objects.filter(name__in=names).count() == len(names)
+
+
+@pytest.mark.django_db
+def test_resolve_groups_cached_on_commit(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    sales = Group.objects.create(name="sales")
+    with django_assert_num_queries(1):
+        resolve_groups(["sales"])
+    with django_assert_num_queries(1):
+        resolve_groups(["sales"])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resolve_groups(["sales"])
+
+    with django_assert_num_queries(0):
+        groups = resolve_groups(["sales"])
+    assert groups["sales"].id == sales.id
+
+
+@pytest.mark.django_db
+def test_resolve_groups_invalidated_on_change(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    sales = Group.objects.create(name="sales")
+    with django_capture_on_commit_callbacks(execute=True):
+        resolve_groups(["sales"])
+
+    sales.name = "marketing"
+    sales.save()
+
+    with django_assert_num_queries(3):
+        groups = resolve_groups(["sales"])
+    assert groups["sales"].id != sales.id
+
+
+@pytest.mark.django_db
+def test_groups_field_resolves_names_once(django_assert_num_queries):
+    field = UserCreateSerializer().fields["groups"]
+
+    with django_assert_num_queries(3):
+        groups = field.to_internal_value(["support", "sales", "support"])
+
+    assert [group.name for group in groups] == ["support", "sales"]
+
+
+def test_groups_field_rejects_invalid_names():
+    field = UserCreateSerializer().fields["groups"]
+
+    with pytest.raises(ValidationError):
+        field.to_internal_value("sales")
+    with pytest.raises(ValidationError):
+        field.to_internal_value([{"name": "sales"}])
+
+
+def _cache_deleted_group(name):
+    # Another process deleted the group after this one cached its id
+    group = Group.objects.create(name=name)
+    group_cache.set(name, group.id, 300)
+    Group.objects.filter(pk=group.pk)._raw_delete(Group.objects.db)
+    return group.id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_with_deleted_group(as_staff_token, client):
+    stale_id = _cache_deleted_group("sales")
+    payload = create_user_payload("foo8", "p121212Ab", "p121212Ab", ["sales"])
+
+    response = client.post(
+        ENDPOINT_USER,
+        data=payload,
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+
+    assert response.status_code == 201
+    assert response.json()["groups"] == ["sales"]
+    group = User.objects.get(username="foo8").groups.get()
+    assert group.name == "sales" and group.id != stale_id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_update_with_deleted_group(as_staff_token, client):
+    _cache_deleted_group("sales")
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/",
+        data={"groups": ["sales"], "password": "p121212Ab"},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+
+    assert response.status_code == 200
+    assert [group.name for group in user.groups.all()] == ["sales"]
+    user.refresh_from_db()
+    assert user.check_password("p121212Ab"), "Hashed once"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_create_with_deleted_group(as_staff_token, client):
+    _cache_deleted_group("sales")
+    items = [
+        create_user_payload(f"bulk{i}", "p121212Ab", "p121212Ab", ["sales"])
+        for i in range(2)
+    ]
+
+    response = client.post(
+        f"{ENDPOINT_USER}bulk/",
+        data=items,
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+
+    assert response.status_code == 201
+    assert Group.objects.get(name="sales").user_set.count() == 2
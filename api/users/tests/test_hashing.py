@@ -0,0 +1,110 @@
+from concurrent.futures import Future
+
+import pytest
+from django.contrib.auth.hashers import (
+    MD5PasswordHasher,
+    check_password as django_check,
+)
+from django.test import override_settings
+
+from .. import hashing
+from ..backends import HashingModelBackend
+from ..models import User
+from .dependencies import (
+    as_staff,
+    as_staff_token,
+    create_app,
+    create_user_payload,
+    TEST_CLIENT_ID,
+    TEST_CLIENT_SECRET,
+)
+
+
+def test_hashing_sync():
+    encoded = hashing.make_password("p121212Ab")
+
+    assert encoded != "p121212Ab"
+    assert hashing.check_password("p121212Ab", encoded)
+    assert not hashing.check_password("other", encoded)
+
+
+@override_settings(PASSWORD_HASHING={"EXECUTOR": "process", "WORKERS": 2})
+def test_hashing_process_pool():
+    encoded = hashing.make_passwords(["a1b2c3d4e5", "f6g7h8i9j0"])
+
+    assert hashing.get_executor() is not None
+    assert django_check("a1b2c3d4e5", encoded[0])
+    assert hashing.check_password("f6g7h8i9j0", encoded[1])
+    hashing.get_executor().shutdown()
+    hashing._executor = None
+
+
+class StalledExecutor:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, func, *args):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+
+@override_settings(PASSWORD_HASHING={"EXECUTOR": "process", "TIMEOUT": 0.01})
+def test_hashing_pool_timeout(monkeypatch):
+    executor = StalledExecutor()
+    monkeypatch.setattr(hashing, "get_executor", lambda: executor)
+
+    encoded = hashing.make_password("p121212Ab")
+
+    assert django_check("p121212Ab", encoded), "Hashed in process"
+    assert executor.futures[0].cancelled()
+
+
+@override_settings(PASSWORD_HASHING={"EXECUTOR": "process", "TIMEOUT": 0.01})
+def test_hashing_pool_timeout_many(monkeypatch):
+    executor = StalledExecutor()
+    monkeypatch.setattr(hashing, "get_executor", lambda: executor)
+
+    encoded = hashing.make_passwords(["a1b2c3d4e5", "f6g7h8i9j0"])
+
+    assert django_check("a1b2c3d4e5", encoded[0]), "Hashed in process"
+    assert django_check("f6g7h8i9j0", encoded[1])
+    assert all(future.cancelled() for future in executor.futures)
+
+
+@pytest.mark.django_db
+@override_settings(
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ]
+)
+def test_backend_upgrades_hash():
+    user = User.objects.create(username="foo")
+    user.password = MD5PasswordHasher().encode("p121212Ab", "salt")
+    user.save()
+
+    backend = HashingModelBackend()
+    assert backend.authenticate(None, username="foo", password="bad") is None
+    assert backend.authenticate(None, username="foo", password="p121212Ab")
+
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$"), "Hash upgraded"
+
+
+@pytest.mark.django_db
+def test_created_user_can_login(as_staff_token, client):
+    payload = create_user_payload("foo8", "p121212Ab", "p121212Ab", [])
+    response = client.post(
+        "/api/v1/users/",
+        data=payload,
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/o/token/",
+        data=f"grant_type=password&username=foo8&password=p121212Ab&client_id={TEST_CLIENT_ID}&client_secret={TEST_CLIENT_SECRET}",
+        content_type="application/x-www-form-urlencoded",
+    )
+    assert response.status_code == 200, "Password must be stored hashed"
@@ -0,0 +1,113 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+def _get(client, token, params=None, url=ENDPOINT_USER):
+    return client.get(url, data=params, AUTHORIZATION=f"Bearer {token}")
+
+
+def _create_users(count, subscription="active"):
+    sales = Group.objects.get_or_create(name="sales")[0]
+    users = []
+    for number in range(count):
+        user = User.objects.create(
+            username=f"listed{number}{subscription}", subscription=subscription
+        )
+        user.groups.add(sales)
+        users.append(user)
+    return users
+
+
+@pytest.mark.django_db
+def test_list_users_as_non_staff(as_non_staff_token, client):
+    response = _get(client, as_non_staff_token)
+
+    assert response.status_code == 403, "Staff user required"
+
+
+@pytest.mark.django_db
+def test_list_users_walks_every_page(as_staff_token, client):
+    _create_users(23)
+    expected = list(
+        User.objects.order_by("-created", "-id").values_list("id", flat=True)
+    )
+
+    seen = []
+    url, params = ENDPOINT_USER, {"page_size": 10}
+    with CaptureQueriesContext(connection) as context:
+        while url:
+            response = _get(client, as_staff_token, params, url)
+            assert response.status_code == 200
+            body = response.json()
+            seen += [result["id"] for result in body["results"]]
+            url, params = body["next"], None
+
+    assert seen == [str(pk) for pk in expected]
+    assert len(body["results"]) == 5
+    assert not any(
+        "OFFSET" in query["sql"] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+def test_list_users_query_count_independent_of_depth(as_staff_token, client):
+    _create_users(30)
+    first = _get(client, as_staff_token, {"page_size": 5}).json()
+    assert first["results"][0]["groups"] == ["sales"]
+
+    with CaptureQueriesContext(connection) as shallow:
+        _get(client, as_staff_token, {"page_size": 5})
+    url = first["next"]
+    for _ in range(4):
+        url = _get(client, as_staff_token, url=url).json()["next"]
+    with CaptureQueriesContext(connection) as deep:
+        _get(client, as_staff_token, url=url)
+
+    assert len(deep.captured_queries) == len(shallow.captured_queries)
+
+
+@pytest.mark.django_db
+def test_list_users_filters(as_staff_token, client):
+    _create_users(2, "inactive")
+    support = Group.objects.create(name="support")
+    User.objects.get(username="listed1inactive").groups.add(support)
+
+    def usernames(params):
+        response = _get(client, as_staff_token, params)
+        assert response.status_code == 200
+        return {user["username"] for user in response.json()["results"]}
+
+    assert usernames({"subscription": "inactive"}) == {
+        "listed0inactive",
+        "listed1inactive",
+    }
+    assert usernames({"group": "support"}) == {"listed1inactive"}
+    assert len(usernames({"is_staff": "true"})) == 1
+    assert usernames({"created_before": "2000-01-01T00:00:00Z"}) == set()
+    assert len(usernames({"created_after": "2000-01-01T00:00:00"})) == 4
+
+
+@pytest.mark.django_db
+def test_list_users_invalid_params(as_staff_token, client):
+    for params in (
+        {"cursor": "bogus"},
+        {"page_size": "many"},
+        {"is_staff": "maybe"},
+        {"created_after": "yesterday"},
+    ):
+        response = _get(client, as_staff_token, params)
+        assert response.status_code == 400, params
@@ -0,0 +1,151 @@
+import pytest
+from django.core import checks
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from ..authentication import CachedOAuth2Authentication, token_cache
+from ..responses import user_responses
+from ..middleware import ApiAuthenticationMiddleware
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    empty_token_cache,
+    TEST_NONSTAFF_USERNAME,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+DJANGO_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "oauth2_provider.middleware.OAuth2TokenMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+OAUTH2_BACKENDS = [
+    "oauth2_provider.backends.OAuth2Backend",
+    "users.backends.HashingModelBackend",
+]
+
+
+def _tables(queries):
+    tables = []
+    for query in queries:
+        sql = query["sql"]
+        tables.append(sql.split(" FROM ", 1)[1].split()[0].strip('"'))
+    return tables
+
+
+@pytest.mark.django_db
+def test_api_request_queries(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    # A session cookie used to load the session and its user too
+    client.force_login(user)
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(
+            f"{ENDPOINT_USER}{user.id}/",
+            HTTP_AUTHORIZATION=f"Bearer {as_staff_token}",
+        )
+
+    assert response.status_code == 200
+    assert "Authorization" in response["Vary"]
+    assert "Set-Cookie" not in response.headers
+    tables = _tables(context.captured_queries)
+    assert "django_session" not in tables, "Api requests skip sessions"
+    assert tables == [
+        "oauth2_provider_accesstoken",  # token, application and user
+        "users_user",  # user version
+        "users_user",  # user
+        "auth_group",  # user groups
+    ]
+
+
+@pytest.mark.django_db
+def test_api_request_saves_queries(as_staff_token):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+
+    def queries():
+        # New clients load the middlewares of the current settings
+        client = Client()
+        token_cache.clear()
+        user_responses.clear()
+        with CaptureQueriesContext(connection) as context:
+            client.get(
+                f"{ENDPOINT_USER}{user.id}/",
+                HTTP_AUTHORIZATION=f"Bearer {as_staff_token}",
+            )
+        return _tables(context.captured_queries)
+
+    api_stack = queries()
+    # The token middleware validates through the OAuth2 backend, then
+    # DRF validates again
+    with override_settings(
+        MIDDLEWARE=DJANGO_MIDDLEWARE,
+        AUTHENTICATION_BACKENDS=OAUTH2_BACKENDS,
+    ):
+        django_stack = queries()
+
+    assert api_stack.count("oauth2_provider_accesstoken") == 1
+    assert django_stack == ["oauth2_provider_accesstoken"] + api_stack
+
+
+@pytest.mark.django_db
+def test_api_authenticated_once(as_staff_token, django_assert_num_queries):
+    request = RequestFactory().get(
+        ENDPOINT_USER, HTTP_AUTHORIZATION=f"Bearer {as_staff_token}"
+    )
+    seen = {}
+
+    def view(request):
+        seen["middleware"] = request.user.username
+        user, _ = CachedOAuth2Authentication().authenticate(Request(request))
+        seen["drf"] = user.username
+        return HttpResponse()
+
+    with django_assert_num_queries(1):
+        ApiAuthenticationMiddleware(view)(request)
+
+    assert seen == {
+        "middleware": TEST_STAFF_USERNAME,
+        "drf": TEST_STAFF_USERNAME,
+    }
+
+
+def test_deploy_checks_see_stock_middlewares():
+    messages = checks.run_checks(include_deployment_checks=True)
+
+    assert "security.W003" not in {message.id for message in messages}
+
+
+@pytest.mark.django_db
+def test_other_requests_keep_sessions(create_app, client):
+    user = User.objects.get(username=TEST_STAFF_USERNAME)
+    client.force_login(user)
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/admin/")
+
+    assert response.status_code == 200
+    assert "django_session" in _tables(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_api_request_without_token(client, create_app):
+    response = client.get(ENDPOINT_USER)
+
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
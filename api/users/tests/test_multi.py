@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import User
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    TEST_NONSTAFF_USERNAME,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_MULTI = "/api/v1/users/multi/"
+
+
+def _multi(client, ids, token=None):
+    headers = {"AUTHORIZATION": f"Bearer {token}"} if token else {}
+    return client.get(ENDPOINT_MULTI, data={"ids": ",".join(ids)}, **headers)
+
+
+def _ids(*usernames):
+    return [
+        str(User.objects.get(username=username).id) for username in usernames
+    ]
+
+
+@pytest.mark.django_db
+def test_multi_retrieve_unauthenticated(client, create_app):
+    response = _multi(client, _ids(TEST_STAFF_USERNAME))
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_multi_retrieve_as_staff(as_staff_token, client):
+    unknown = str(uuid.uuid4())
+    ids = _ids(TEST_NONSTAFF_USERNAME, TEST_STAFF_USERNAME)
+
+    response = _multi(
+        client, [ids[0], unknown, "bogus", ids[1]], as_staff_token
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["id"] for user in data["results"]] == ids
+    assert all(user.get("password") for user in data["results"])
+    assert data["missing"] == [unknown, "bogus"]
+
+
+@pytest.mark.django_db
+def test_multi_retrieve_as_non_staff(as_non_staff_token, client):
+    staff_id, own_id = _ids(TEST_STAFF_USERNAME, TEST_NONSTAFF_USERNAME)
+
+    response = _multi(client, [staff_id, own_id], as_non_staff_token)
+
+    staff, own = response.json()["results"]
+    assert staff.get("password") is None, "Others get the basic serializer"
+    assert own.get("password") is not None, "Self gets the detailed one"
+
+
+@pytest.mark.django_db
+def test_multi_retrieve_queries_independent_of_ids(as_staff_token, client):
+    for number in range(10):
+        User.objects.create(username=f"multi{number}", subscription="active")
+    ids = [str(pk) for pk in User.objects.values_list("id", flat=True)]
+    # Both measured requests authenticate from the token cache
+    _multi(client, ids[:1], as_staff_token)
+
+    with CaptureQueriesContext(connection) as single:
+        _multi(client, ids[:1], as_staff_token)
+    with CaptureQueriesContext(connection) as many:
+        response = _multi(client, ids, as_staff_token)
+
+    assert len(response.json()["results"]) == len(ids)
+    assert len(many.captured_queries) == len(single.captured_queries)
+
+
+@pytest.mark.django_db
+@override_settings(USERS_API={"MULTI_GET_MAX_IDS": 2})
+def test_multi_retrieve_limits(as_staff_token, client):
+    response = _multi(
+        client, [str(uuid.uuid4()) for _ in range(3)], as_staff_token
+    )
+    assert response.status_code == 400
+
+    response = _multi(client, [], as_staff_token)
+    assert response.status_code == 400
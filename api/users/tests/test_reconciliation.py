@@ -0,0 +1,110 @@
+import json
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from ..models import User
+from ..reconciliation import reconcile_subscriptions
+from ..subscription import SubscriptionException
+
+
+def _create_users(count):
+    User.objects.bulk_create(
+        [
+            User(username=f"user{i}", subscription="active")
+            for i in range(count)
+        ]
+    )
+    return sorted(User.objects.values_list("pk", flat=True))
+
+
+def _fetch_results(statuses):
+    def fetch(uuids, refresh=False):
+        return {
+            str(uid): statuses.get(str(uid), {"subscription": "active"})
+            for uid in uuids
+        }
+
+    return fetch
+
+
+@pytest.mark.django_db
+def test_reconcile_updates_changed_only(django_assert_num_queries):
+    pks = _create_users(5)
+    statuses = {
+        str(pks[0]): {"subscription": "expired"},
+        str(pks[1]): SubscriptionException("down"),
+    }
+    with mock.patch(
+        "users.reconciliation.subscription_service.fetch_subscriptions",
+        side_effect=_fetch_results(statuses),
+    ):
+        # 3 chunks, an empty page, then the versions read and a single
+        # bulk update in a savepoint
+        with django_assert_num_queries(8):
+            report = reconcile_subscriptions(chunk_size=2)
+
+    assert report.processed == 5
+    assert report.updated == 1
+    assert report.failed == 1
+    assert User.objects.get(pk=pks[0]).subscription == "expired"
+    assert User.objects.filter(subscription="active").count() == 4
+
+
+@pytest.mark.django_db
+def test_reconcile_keeps_newer_events():
+    pks = _create_users(2)
+    statuses = {pk: {"subscription": "expired"} for pk in map(str, pks)}
+    fetch_results = _fetch_results(statuses)
+
+    def fetch(uuids, refresh=False):
+        # A webhook event lands while the chunk is fetched
+        User.objects.filter(pk=pks[0]).update(
+            subscription="cancelled", subscription_version=10
+        )
+        return fetch_results(uuids, refresh)
+
+    with mock.patch(
+        "users.reconciliation.subscription_service.fetch_subscriptions",
+        side_effect=fetch,
+    ):
+        report = reconcile_subscriptions(chunk_size=10)
+
+    assert report.updated == 1
+    assert User.objects.get(pk=pks[0]).subscription == "cancelled"
+    assert User.objects.get(pk=pks[1]).subscription == "expired"
+
+
+@pytest.mark.django_db
+def test_reconcile_resumes_from_checkpoint(tmp_path):
+    pks = _create_users(4)
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(
+        json.dumps(
+            {"processed": 2, "updated": 0, "failed": 0, "last_pk": str(pks[1])}
+        )
+    )
+    fetch = mock.Mock(side_effect=_fetch_results({}))
+    with mock.patch(
+        "users.reconciliation.subscription_service.fetch_subscriptions",
+        fetch,
+    ):
+        report = reconcile_subscriptions(
+            chunk_size=10, checkpoint=str(checkpoint)
+        )
+
+    fetched = fetch.call_args.args[0]
+    assert fetched == pks[2:], "Only users after the checkpoint are fetched"
+    assert report.processed == 4
+    assert not checkpoint.exists(), "Checkpoint is removed once done"
+
+
+@pytest.mark.django_db
+def test_reconcile_command(tmp_path, capsys):
+    _create_users(2)
+    call_command(
+        "reconcile_subscriptions", checkpoint=str(tmp_path / "checkpoint")
+    )
+
+    assert "Done: 2 processed" in capsys.readouterr().out
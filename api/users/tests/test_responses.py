@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.auth.models import Group
+
+from ..models import User
+from ..responses import BASIC, DETAILED, user_responses
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+    empty_response_cache,
+    TEST_NONSTAFF_USERNAME,
+    TEST_STAFF_USERNAME,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+def _retrieve(client, token, user):
+    return client.get(
+        f"{ENDPOINT_USER}{user.id}/", AUTHORIZATION=f"Bearer {token}"
+    )
+
+
+@pytest.mark.django_db
+def test_retrieve_is_cached(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    first = _retrieve(client, as_staff_token, user).json()
+
+    # Queryset updates skip signals, so the cached response is kept
+    User.objects.filter(pk=user.pk).update(first_name="changed")
+    second = _retrieve(client, as_staff_token, user).json()
+
+    assert second == first
+    assert user_responses.get(str(user.pk), DETAILED) == first
+    assert user_responses.get(str(user.pk), BASIC) is None
+
+
+@pytest.mark.django_db
+def test_retrieve_variants_cached_apart(
+    as_staff_token, as_non_staff_token, client
+):
+    user = User.objects.get(username=TEST_STAFF_USERNAME)
+    basic = _retrieve(client, as_non_staff_token, user).json()
+    detailed = _retrieve(client, as_staff_token, user).json()
+
+    assert "email" not in basic
+    assert detailed["email"] == user.email
+    assert user_responses.get(str(user.pk), BASIC) == basic
+    assert user_responses.get(str(user.pk), DETAILED) == detailed
+
+
+@pytest.mark.django_db
+def test_retrieve_forgotten_on_save_and_delete(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    _retrieve(client, as_staff_token, user)
+
+    user.first_name = "changed"
+    user.save()
+    data = _retrieve(client, as_staff_token, user).json()
+    assert data["first_name"] == "changed"
+
+    user.delete()
+    response = _retrieve(client, as_staff_token, user)
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_retrieve_forgotten_on_membership_change(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    sales = Group.objects.create(name="sales")
+    _retrieve(client, as_staff_token, user)
+
+    user.groups.add(sales)
+    assert _retrieve(client, as_staff_token, user).json()["groups"] == [
+        "sales"
+    ]
+
+    sales.user_set.remove(user)
+    assert _retrieve(client, as_staff_token, user).json()["groups"] == []
+
+    sales.user_set.add(user)
+    _retrieve(client, as_staff_token, user)
+    sales.name = "marketing"
+    sales.save()
+    assert _retrieve(client, as_staff_token, user).json()["groups"] == [
+        "marketing"
+    ]
+
+
+@pytest.mark.django_db
+def test_retrieve_forgotten_on_update(as_staff_token, client):
+    user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
+    _retrieve(client, as_staff_token, user)
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/",
+        data={"last_name": "renamed", "groups": ["support"]},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+    assert response.status_code == 200
+
+    data = _retrieve(client, as_staff_token, user).json()
+    assert data["last_name"] == "renamed"
+    assert data["groups"] == ["support"]
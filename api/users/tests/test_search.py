@@ -0,0 +1,108 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from ..models import User
+from ..search import SQLITE_SEARCH, search_users
+from .dependencies import (
+    as_non_staff_token,
+    as_nonstaff,
+    as_staff,
+    as_staff_token,
+    create_app,
+)
+
+
+ENDPOINT_SEARCH = "/api/v1/users/search/"
+
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="SQLite FTS5 search"
+)
+
+
+def _search(client, token, **params):
+    return client.get(
+        ENDPOINT_SEARCH, data=params, AUTHORIZATION=f"Bearer {token}"
+    )
+
+
+@pytest.fixture
+def searchable_users():
+    for username, first_name, email in (
+        ("jdoe", "John", "john.doe@ine.com"),
+        ("jsmith", "Johanna", "jsmith@example.com"),
+        ("mroe", "Mary", "mary@ine.com"),
+    ):
+        User.objects.create(
+            username=username,
+            first_name=first_name,
+            email=email,
+            subscription="active",
+        )
+
+
+@pytest.mark.django_db
+def test_search_as_non_staff(as_non_staff_token, client):
+    response = _search(client, as_non_staff_token, q="john")
+
+    assert response.status_code == 403, "Staff user required"
+
+
+@pytest.mark.django_db
+def test_search_users(as_staff_token, client, searchable_users):
+    response = _search(client, as_staff_token, q="JOH")
+
+    assert response.status_code == 200
+    usernames = [user["username"] for user in response.json()["results"]]
+    assert sorted(usernames) == ["jdoe", "jsmith"]
+
+    response = _search(client, as_staff_token, q="@ine.com", limit=2)
+    assert len(response.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_search_follows_changes(searchable_users):
+    user = User.objects.get(username="mroe")
+    user.email = "mary@renamed.org"
+    user.save()
+
+    assert [found.username for found in search_users("renamed")] == ["mroe"]
+    assert search_users("mary@ine") == []
+
+    user.delete()
+    assert search_users("renamed") == []
+
+
+@pytest.mark.django_db
+def test_search_short_query(as_staff_token, client):
+    response = _search(client, as_staff_token, q="jo")
+
+    assert response.status_code == 400
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_search_uses_index(searchable_users):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"EXPLAIN QUERY PLAN {SQLITE_SEARCH}", ['"doe"', 1000, 20]
+        )
+        plan = [row[-1] for row in cursor.fetchall()]
+    assert any(
+        step.startswith("SCAN users_user_search VIRTUAL TABLE INDEX")
+        for step in plan
+    ), "Matches come from the FTS5 index"
+    assert "SEARCH users_user USING INTEGER PRIMARY KEY (rowid=?)" in plan
+    assert "SCAN users_user" not in plan
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_rebuild_search_command(searchable_users):
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER users_user_search_insert")
+
+    call_command("rebuild_user_search", stdout=None)
+    User.objects.create(username="rebuilt", subscription="active")
+
+    assert [user.username for user in search_users("rebuil")] == ["rebuilt"]
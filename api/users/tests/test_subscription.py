@@ -1,5 +1,25 @@
+import asyncio
+import json
+import re
+import threading
+import time
 import uuid
-from ..subscription import subscription_service
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+import responses
+from django.test import override_settings
+
+from ..subscription import (
+    JitteredRetry,
+    SubscriptionClient,
+    SubscriptionClientMock,
+    SubscriptionException,
+    SubscriptionService,
+    SubscriptionUnavailable,
+    subscription_service,
+)
 
 
 def test_subscription():
@@ -7,3 +27,304 @@ def test_subscription():
     response = subscription_service.fetch_subscription(id)
 
     assert response["subscription"] == "active", "Failed on subscription fetch"
+
+
+@override_settings(
+    SUBSCRIPTION_SERVICE={
+        "BASE_API_URL": "http://local.test/api/",
+        "POOL_MAXSIZE": 4,
+        "CONNECT_TIMEOUT": 1,
+        "READ_TIMEOUT": 2,
+        "RETRIES": 5,
+    }
+)
+def test_client_options_from_settings():
+    client = SubscriptionClient()
+
+    assert client.base_url == "http://local.test/api/"
+    assert client.timeout == (1, 2), "Connect and read timeouts are split"
+    assert client._adapter._pool_maxsize == 4
+    assert client._adapter.max_retries.total == 5
+    assert client._adapter.max_retries.allowed_methods == {"GET"}
+
+
+def test_client_sessions_share_pool():
+    client = SubscriptionClient()
+    sessions = []
+
+    def grab():
+        sessions.append(client.session)
+
+    thread = threading.Thread(target=grab)
+    thread.start()
+    thread.join()
+
+    assert sessions[0] is not client.session, "Sessions are per thread"
+    assert sessions[0].get_adapter("https://x") is client.session.get_adapter(
+        "https://x"
+    ), "Connection pool must be shared"
+
+
+def test_retry_backoff_jitter():
+    retry = JitteredRetry(
+        total=5, backoff_factor=1, jitter=0.5, backoff_cap=3
+    ).increment(method="GET", url="/")
+    retry = retry.increment(method="GET", url="/")
+
+    for _ in range(20):
+        backoff = retry.get_backoff_time()
+        assert 2 <= backoff <= 2.5, "Backoff must add a bounded jitter"
+        assert retry.new().jitter == 0.5, "Jitter kept between attempts"
+
+    for _ in range(3):
+        retry = retry.increment(method="GET", url="/")
+    assert retry.get_backoff_time() == 3, "Backoff must be capped"
+
+
+@responses.activate
+def test_fetch_subscription_network_error():
+    responses.add(
+        responses.GET,
+        "http://local.test/api/users/1",
+        body=requests.ConnectionError("refused"),
+    )
+    service = SubscriptionService(
+        SubscriptionClient({"BASE_API_URL": "http://local.test/api/"})
+    )
+
+    with pytest.raises(SubscriptionException):
+        service.fetch_subscription(1)
+
+
+def _local_service(**options):
+    options["BASE_API_URL"] = "http://local.test/api/"
+    return SubscriptionService(options=options)
+
+
+@responses.activate
+def test_fetch_subscription_cached():
+    responses.add(
+        responses.GET,
+        "http://local.test/api/users/1",
+        json={"id": "1", "subscription": "active"},
+    )
+    service = _local_service()
+
+    assert service.fetch_subscription(1)["subscription"] == "active"
+    assert service.fetch_subscription(1)["subscription"] == "active"
+    assert len(responses.calls) == 1, "Second lookup must hit the cache"
+    assert service.cache_stats["hits"] == 1
+    assert service.cache_stats["misses"] == 1
+
+    service.invalidate(1)
+    service.fetch_subscription(1)
+    assert len(responses.calls) == 2, "Invalidated lookups go remote"
+
+
+@responses.activate
+def test_fetch_subscription_negative_cached():
+    responses.add(responses.GET, "http://local.test/api/users/1", status=404)
+    responses.add(responses.GET, "http://local.test/api/users/2", status=503)
+    service = _local_service(RETRIES=0)
+
+    for _ in range(2):
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(1)
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(2)
+
+    calls = [call.request.url for call in responses.calls]
+    assert calls.count("http://local.test/api/users/1") == 1
+    assert (
+        calls.count("http://local.test/api/users/2") == 2
+    ), "Server errors must not be cached"
+
+
+@responses.activate
+def test_fetch_subscription_django_cache():
+    responses.add(
+        responses.GET,
+        "http://local.test/api/users/1",
+        json={"id": "1", "subscription": "active"},
+    )
+    service = _local_service(CACHE_BACKEND="django")
+
+    service.fetch_subscription(1)
+    service.fetch_subscription(1)
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_fetch_subscription_breaker_opens():
+    responses.add(
+        responses.GET, re.compile("http://local.test/api/users/.*"), status=500
+    )
+    service = _local_service(RETRIES=0, BREAKER_FAILURES=2)
+
+    for uid in range(2):
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(uid)
+    with pytest.raises(SubscriptionUnavailable):
+        service.fetch_subscription(3)
+
+    assert len(responses.calls) == 2, "Open circuit must not call the service"
+    assert service.stats["breaker"]["state"] == "open"
+    assert service.stats["breaker"]["rejections"] == 1
+
+
+class SlowClient:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def get(self, endpoint, params=None):
+        self.calls += 1
+        self.release.wait(5)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"subscription": "active"}'
+        return response
+
+
+def test_fetch_subscription_coalesced():
+    client = SlowClient()
+    service = SubscriptionService(client, options={"CACHE_BACKEND": "none"})
+    results = []
+
+    def fetch():
+        results.append(service.fetch_subscription(1))
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while service.stats["coalesced"] < 4:
+        time.sleep(0.01)
+    client.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1, "Concurrent lookups must be coalesced"
+    assert results == [{"subscription": "active"}] * 5
+
+
+def test_afetch_subscription_coalesced():
+    client = SlowClient()
+    service = SubscriptionService(client, options={"CACHE_BACKEND": "none"})
+
+    async def fetch_all():
+        tasks = [service.afetch_subscription(1) for _ in range(5)]
+        asyncio.get_running_loop().call_later(0.05, client.release.set)
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(fetch_all())
+
+    assert client.calls == 1, "Concurrent lookups must be coalesced"
+    assert results == [{"subscription": "active"}] * 5
+
+
+def test_fetch_subscriptions_mock():
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    results = SubscriptionService(
+        SubscriptionClientMock(), options={"CACHE_BACKEND": "none"}
+    ).fetch_subscriptions(ids)
+
+    assert set(results) == set(ids)
+    assert all(
+        result["subscription"] == "active" for result in results.values()
+    )
+
+
+def test_fetch_subscriptions_mock_concurrent_batches():
+    client = subscription_service._client  # pylint: disable=W0212
+    assert isinstance(client, SubscriptionClientMock)
+    assert subscription_service.batch_concurrency > 1
+    ids = [
+        str(uuid.uuid4())
+        for _ in range(subscription_service.batch_size * 4 + 1)
+    ]
+
+    results = subscription_service.fetch_subscriptions(ids)
+
+    assert set(results) == set(ids)
+    assert all(
+        result == {"id": uid, "subscription": "active"}
+        for uid, result in results.items()
+    ), "Batches fetched from threads share the mock"
+
+
+def _batch_callback(request):
+    ids = parse_qs(urlparse(request.url).query)["ids"][0].split(",")
+    if "bad" in ids:
+        return (500, {}, "down")
+    body = {
+        "results": [
+            {"id": uid, "subscription": "active"}
+            for uid in ids
+            if uid not in ("2", "3")
+        ],
+        "errors": {"3": "invalid"} if "3" in ids else {},
+    }
+    return (200, {}, json.dumps(body))
+
+
+@responses.activate
+def test_fetch_subscriptions_chunks_and_errors():
+    responses.add_callback(
+        responses.GET, "http://local.test/api/users", callback=_batch_callback
+    )
+    service = _local_service(RETRIES=0, BATCH_SIZE=2, BATCH_CONCURRENCY=2)
+
+    results = service.fetch_subscriptions(["1", "2", "3", "4", "5", "bad"])
+
+    assert len(responses.calls) == 3, "Six ids in batches of two"
+    assert results["1"] == {"id": "1", "subscription": "active"}
+    assert isinstance(results["2"], SubscriptionException), "Missing id"
+    assert str(results["3"]) == "invalid"
+    assert isinstance(results["bad"], SubscriptionException)
+    assert isinstance(results["5"], SubscriptionException), "Failed batch"
+
+    service.fetch_subscriptions(["1", "2"])
+    assert len(responses.calls) == 3, "Results and unknown ids are cached"
+
+    service.fetch_subscriptions(["1", "3"])
+    assert len(responses.calls) == 4, "Per-id errors aren't cached"
+    assert responses.calls[3].request.url.endswith("ids=3")
+
+
+@responses.activate
+def test_fetch_subscription_throttled_not_cached():
+    responses.add(responses.GET, "http://local.test/api/users/1", status=400)
+    responses.add(responses.GET, "http://local.test/api/users/2", status=429)
+    service = _local_service(RETRIES=0, BREAKER_FAILURES=2)
+
+    for uid in (1, 1, 2):
+        with pytest.raises(SubscriptionException):
+            service.fetch_subscription(uid)
+
+    calls = [call.request.url for call in responses.calls]
+    assert calls.count("http://local.test/api/users/1") == 2, "Not cached"
+    assert service.stats["breaker"]["state"] == "closed"
+
+    with pytest.raises(SubscriptionException):
+        service.fetch_subscription(2)
+    assert (
+        service.stats["breaker"]["state"] == "open"
+    ), "Throttling counts as a failure"
+
+
+@responses.activate
+def test_fetch_subscriptions_rejected_batch():
+    responses.add(responses.GET, "http://local.test/api/users", status=414)
+    service = _local_service(RETRIES=0, BREAKER_FAILURES=1)
+
+    for _ in range(2):
+        results = service.fetch_subscriptions(["1", "2"])
+        assert all(
+            isinstance(result, SubscriptionException)
+            for result in results.values()
+        )
+
+    assert len(responses.calls) == 2, "Rejected batches aren't cached"
+    assert (
+        service.stats["breaker"]["state"] == "closed"
+    ), "Client errors aren't failures"
@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+
+from ..models import User, SUBSCRIPTION_PENDING
+from ..subscription import SubscriptionException
+from ..tasks import resolve_subscription
+from .dependencies import (
+    as_staff,
+    as_staff_token,
+    create_app,
+    create_user_payload,
+)
+
+
+ENDPOINT_USER = "/api/v1/users/"
+
+
+@pytest.mark.django_db
+@override_settings(
+    SUBSCRIPTION_SERVICE={"MODE": "deferred", "EXECUTOR": "sync"}
+)
+def test_create_user_deferred_subscription(
+    as_staff_token, client, django_capture_on_commit_callbacks
+):
+    payload = create_user_payload("foo5", "p121212Ab", "p121212Ab", [])
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = client.post(
+            ENDPOINT_USER,
+            data=payload,
+            content_type="application/json",
+            AUTHORIZATION=f"Bearer {as_staff_token}",
+        )
+
+    assert response.status_code == 201
+    assert response.json()["subscription"] == SUBSCRIPTION_PENDING
+    assert len(callbacks) == 1, "Subscription must be resolved on commit"
+
+    callbacks[0]()
+    user = User.objects.get(username="foo5")
+    assert user.subscription == "active"
+
+
+@pytest.mark.django_db
+def test_resolve_subscription_retries():
+    user = User.objects.create(username="foo", subscription="pending")
+    fetch = mock.Mock(
+        side_effect=[SubscriptionException("down"), {"subscription": "x"}]
+    )
+    with mock.patch(
+        "users.tasks.subscription_service.fetch_subscription", fetch
+    ):
+        assert resolve_subscription(user.id, retries=2, backoff=0) == "x"
+
+    assert fetch.call_count == 2
+    user.refresh_from_db()
+    assert user.subscription == "x"
+
+
+@pytest.mark.django_db
+def test_resolve_subscription_gives_up():
+    user = User.objects.create(username="foo", subscription="pending")
+    fetch = mock.Mock(side_effect=SubscriptionException("down"))
+    with mock.patch(
+        "users.tasks.subscription_service.fetch_subscription", fetch
+    ):
+        assert resolve_subscription(user.id, retries=1, backoff=0) is None
+
+    assert fetch.call_count == 2
+    user.refresh_from_db()
+    assert user.subscription == SUBSCRIPTION_PENDING
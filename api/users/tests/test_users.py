@@ -1,7 +1,14 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from oauth2_provider.models import Application
 import pytest
 
 from ..models import User
+from ..serializers import UserCreateSerializer, UserCreatedSerializer
+from ..subscription import SubscriptionUnavailable
 from .dependencies import (
     as_non_staff_token,
     as_nonstaff,
@@ -51,6 +58,59 @@ def test_create_user_as_staff(as_staff_token, client):
     assert data["username"] == "foo3", "Username doesn't match"
 
 
+def _user_writes(queries):
+    return [
+        query["sql"].split(" ", 1)[0]
+        for query in queries
+        if '"users_user' in query["sql"]
+        and not query["sql"].startswith("SELECT")
+    ]
+
+
+@pytest.mark.django_db
+def test_create_user_single_write(as_staff_token, client):
+    payload = create_user_payload(
+        "foo4", "p121212Ab", "p121212Ab", ["sales", "support"]
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            ENDPOINT_USER,
+            data=payload,
+            content_type="application/json",
+            AUTHORIZATION=f"Bearer {as_staff_token}",
+        )
+
+    assert response.status_code == 201
+    assert _user_writes(context.captured_queries) == ["INSERT", "INSERT"]
+    assert not any(
+        "users_user_groups" in query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+    ), "Groups must be answered from memory"
+    assert sorted(response.json()["groups"]) == ["sales", "support"]
+
+
+@pytest.mark.django_db
+def test_create_user_query_budget(django_assert_num_queries):
+    serializer = UserCreateSerializer(
+        data=create_user_payload(
+            "foo5", "p121212Ab", "p121212Ab", ["sales", "support"]
+        )
+    )
+    assert serializer.is_valid()
+
+    # SAVEPOINT, user INSERT, groups INSERT, RELEASE SAVEPOINT
+    with django_assert_num_queries(4):
+        user = serializer.save()
+        data = UserCreatedSerializer(instance=user).data
+
+    assert data["groups"] == ["sales", "support"]
+    assert set(
+        User.objects.get(pk=user.pk).groups.values_list("name", flat=True)
+    ) == {"sales", "support"}
+
+
 @pytest.mark.django_db
 def test_create_user_bad_pass_as_staff(as_staff_token, client):
     payload = create_user_payload(
@@ -240,6 +300,36 @@ def test_partial_update_user_as_staff(as_staff_token, client):
     assert data["first_name"] == "Johncito"
 
 
+@pytest.mark.django_db
+def test_partial_update_email_taken_ignoring_case(as_staff_token, client):
+    user = User.objects.get(username=TEST_STAFF_USERNAME)
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/",
+        data={"email": "BAR@ine.com"},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+    assert response.status_code == 400, "Emails are compared ignoring case"
+
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/",
+        data={"email": "FOO@ine.com"},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+    assert response.status_code == 200, "Users can keep their own email"
+
+    User.objects.update(email="")
+    response = client.patch(
+        f"{ENDPOINT_USER}{user.id}/",
+        data={"email": ""},
+        content_type="application/json",
+        AUTHORIZATION=f"Bearer {as_staff_token}",
+    )
+    assert response.status_code == 200, "Blank emails aren't unique"
+
+
 @pytest.mark.django_db
 def test_partial_update_user_as_non_staff(as_non_staff_token, client):
     user = User.objects.get(username=TEST_NONSTAFF_USERNAME)
@@ -302,3 +392,31 @@ def test_delete_user_as_non_staff(as_staff_token, client):
         AUTHORIZATION=f"Bearer {as_staff_token}",
     )
     assert response.status_code == 204, "staff can delete non staff"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "fallback,status_code", [("fail", 503), ("unknown", 201)]
+)
+def test_create_user_subscription_down(
+    as_staff_token, client, fallback, status_code
+):
+    payload = create_user_payload("foo6", "p121212Ab", "p121212Ab", [])
+    with override_settings(SUBSCRIPTION_SERVICE={"FALLBACK": fallback}):
+        with mock.patch(
+            "users.serializers.subscription_service.fetch_subscription",
+            side_effect=SubscriptionUnavailable("open"),
+        ):
+            response = client.post(
+                ENDPOINT_USER,
+                data=payload,
+                content_type="application/json",
+                AUTHORIZATION=f"Bearer {as_staff_token}",
+            )
+
+    assert response.status_code == status_code
+    users = User.objects.filter(username="foo6")
+    if fallback == "fail":
+        assert not users.exists(), "User must not be created"
+    else:
+        assert users.get().subscription == "unknown"
@@ -0,0 +1,50 @@
+import time
+import uuid
+from unittest import mock
+
+import pytest
+
+from ..models import User
+from ..uuids import UUID7Generator, uuid7, uuid7_time
+
+
+def test_uuid7_layout():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(uuid7_time(value) - time.time()) < 1
+    assert uuid7_time(uuid.uuid4()) is None
+
+
+def test_uuid7_ordered():
+    values = [uuid7() for _ in range(10000)]
+
+    assert values == sorted(values)
+    assert [str(value) for value in values] == sorted(map(str, values))
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_ordered_on_frozen_and_backward_clock():
+    generator = UUID7Generator()
+    now = time.time_ns()
+
+    with mock.patch("users.uuids.time.time_ns", return_value=now):
+        frozen = [generator() for _ in range(5000)]
+    with mock.patch("users.uuids.time.time_ns", return_value=now - 10**9):
+        backward = [generator() for _ in range(10)]
+
+    values = frozen + backward
+    assert values == sorted(values), "Counter overflow must move time ahead"
+    assert all(value.version == 7 for value in values)
+
+
+@pytest.mark.django_db
+def test_user_default_id_is_uuid7():
+    legacy = User.objects.create(
+        id=uuid.uuid4(), username="legacy", subscription="active"
+    )
+    user = User.objects.create(username="recent", subscription="active")
+
+    assert user.id.version == 7
+    assert User.objects.get(pk=legacy.id).id.version == 4
@@ -3,12 +3,13 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet
+from .views import SubscriptionEventsView, UserViewSet
 
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet)
 
 urlpatterns = [
+    path("subscriptions/events/", SubscriptionEventsView.as_view()),
     path("", include(router.urls)),
 ]
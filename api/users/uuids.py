@@ -0,0 +1,66 @@
+"""
+    Time ordered UUIDs module
+"""
+import os
+import threading
+import time
+import uuid
+
+
+_COUNTER_BITS = 12
+_COUNTER_MAX = (1 << _COUNTER_BITS) - 1
+
+
+# pylint: disable=R0903
+class UUID7Generator:
+    """
+    UUIDv7 generator (RFC 9562): 48 bits of unix time in milliseconds,
+    a 12 bits counter and 62 random bits.
+
+    The counter starts from a random value every millisecond and grows
+    for UUIDs of the same millisecond, so UUIDs of a process always sort
+    in creation order, even when the clock steps back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+        self._counter = 0
+
+    def _next(self):
+        """Return the timestamp and counter for a new UUID"""
+        now = time.time_ns() // 1_000_000
+        with self._lock:
+            if now > self._last:
+                self._last = now
+                self._counter = int.from_bytes(os.urandom(2), "big") >> 5
+            else:
+                self._counter += 1
+                if self._counter > _COUNTER_MAX:
+                    self._last += 1
+                    self._counter = 0
+            return self._last, self._counter
+
+    def __call__(self):
+        timestamp, counter = self._next()
+        value = (timestamp & 0xFFFFFFFFFFFF) << 80
+        value |= 0x7 << 76
+        value |= counter << 64
+        value |= 0b10 << 62
+        value |= int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+        return uuid.UUID(int=value)
+
+
+_generator = UUID7Generator()
+
+
+def uuid7():
+    """New UUIDv7, ordered after the previous ones of the process"""
+    return _generator()
+
+
+def uuid7_time(value):
+    """Unix time in seconds of a UUIDv7, None for other versions"""
+    if value.version != 7:
+        return None
+    return (value.int >> 80) / 1000
@@ -1,25 +1,46 @@
 """
     Users views
 """
-from django.http import Http404
+import uuid
+
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import viewsets, status
-from rest_framework.decorators import permission_classes
+from rest_framework.decorators import action, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .bulk import bulk_create_users
+from .conf import subscription_settings, users_api_settings
+from .events import apply_subscription_events
+from .export import CONTENT_TYPES, export_users
+from .fastpath import compiled_serializer
+from .fieldsets import parse_fields, project_users, serializer_fields
+from .filters import UserFilterBackend
 from .models import User
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
 from .permissions import (
+    HasWebhookSignature,
     IsStaff,
     StaffDeleteNoStaff,
     IsAdmin,
     PermissionsIsolatedMixin,
 )
+from .responses import BASIC, DETAILED, user_etag, user_responses
+from .search import MIN_QUERY_LENGTH, search_users
 from .serializers import (
     UserCreateSerializer,
+    UserCreatedSerializer,
     UserSerializer,
     UserDetailedSerializer,
     StaffUserUpdateSerializer,
     NonStaffUserUpdateSerializer,
+    SubscriptionEventSerializer,
 )
 
 
@@ -30,17 +51,37 @@ class UserViewSet(PermissionsIsolatedMixin, viewsets.ModelViewSet):
     """
 
     queryset = User.objects
+    pagination_class = KeysetPagination
+    filter_backends = (UserFilterBackend,)
+
+    def get_queryset(self):
+        # Read actions load only the columns of the fields they answer
+        if self.action == "list":
+            serializer_class = UserDetailedSerializer
+        elif self.action == "retrieve":
+            serializer_class = self.get_object_serializer_class(
+                self.kwargs["pk"]
+            )
+        else:
+            return super().get_queryset()
+        fields = serializer_fields(serializer_class, self.requested_fields())
+        return project_users(User.objects.all(), fields)
+
+    def filter_queryset(self, queryset):
+        # Filters are list parameters, objects are looked up by pk only
+        if self.action not in ("list", "export"):
+            return queryset
+        return super().filter_queryset(queryset)
 
     def get_serializer_class(self):
         user = self.request.user
 
-        if self.action == "create":
+        if self.action in ("create", "bulk_create"):
             serializer = UserCreateSerializer
+        elif self.action == "list":
+            serializer = UserDetailedSerializer
         elif self.action == "retrieve":
-            if user.is_staff or self.kwargs.get("pk") == str(user.id):
-                serializer = UserDetailedSerializer
-            else:
-                serializer = UserSerializer
+            serializer = self.get_object_serializer_class(self.kwargs["pk"])
         elif self.action in ("partial_update", "update"):
             if user.is_staff:
                 serializer = StaffUserUpdateSerializer
@@ -50,8 +91,100 @@ class UserViewSet(PermissionsIsolatedMixin, viewsets.ModelViewSet):
             serializer = None
         return serializer
 
-    def list(self, *args, **kwargs):
-        raise Http404
+    def requested_fields(self):
+        """Fields asked with `?fields=a,b`, None when all of them are"""
+        return parse_fields(
+            self.request.query_params.get("fields"),
+            UserDetailedSerializer.Meta.fields,
+        )
+
+    def get_object_serializer_class(self, user_pk):
+        """Detailed serializer for staff or the user itself, basic if not"""
+        user = self.request.user
+        if user.is_staff or str(user_pk) == str(user.id):
+            return UserDetailedSerializer
+        return UserSerializer
+
+    @permission_classes((IsStaff,))
+    def list(self, request, *args, **kwargs):
+        """
+        Staff list of users, newest first, paginated by a cursor and
+        filtered by subscription, group, is_staff and created range
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        fields = serializer_fields(
+            UserDetailedSerializer, self.requested_fields()
+        )
+        serialize = compiled_serializer(UserDetailedSerializer, fields)
+        return self.get_paginated_response(serialize.many(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve a user, detailed for staff or the user itself.
+
+        The ETag and Last-Modified come from the user version, read with
+        a narrow query, so unchanged users are answered 304 without
+        serializing and changed ones from the responses cache if it holds
+        their version. Sparse fieldsets (`?fields=a,b`) are projected from
+        cached responses, or read loading only their columns.
+        """
+        requested = self.requested_fields()
+        try:
+            user_id = str(uuid.UUID(str(kwargs["pk"])))
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        serializer_class = self.get_object_serializer_class(user_id)
+        variant = (
+            DETAILED if serializer_class is UserDetailedSerializer else BASIC
+        )
+        fields = serializer_fields(serializer_class, requested)
+        sparse = fields if requested is not None else None
+
+        version = (
+            User.objects.filter(pk=user_id)
+            .values("updated", "groups_version")
+            .first()
+        )
+        if version is None:
+            raise Http404
+        etag = user_etag(variant, **version, fields=sparse)
+        last_modified = version["updated"]
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp())
+        )
+        if response is None:
+            data = user_responses.get(
+                user_id, variant, user_etag(variant, **version)
+            )
+            if data is None:
+                data, etag, last_modified = self._serialize_user(
+                    serializer_class, variant, fields, sparse
+                )
+            elif sparse is not None:
+                data = {name: data[name] for name in sparse}
+            response = Response(data)
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(
+            last_modified.timestamp()
+        )
+        return response
+
+    def _serialize_user(self, serializer_class, variant, fields, sparse):
+        """
+        Serialize the retrieved user, caching full responses, and return
+        it with its ETag and Last-Modified
+        """
+        instance = self.get_object()
+        version = {
+            "updated": instance.updated,
+            "groups_version": instance.groups_version,
+        }
+        etag = user_etag(variant, **version, fields=sparse)
+        data = compiled_serializer(serializer_class, fields)(instance)
+        if sparse is None:
+            user_responses.set(instance.pk, variant, data, etag)
+        return data, etag, instance.updated
 
     @permission_classes((StaffDeleteNoStaff | IsAdmin,))
     def destroy(self, *args, **kwargs):
@@ -68,6 +201,10 @@ class UserViewSet(PermissionsIsolatedMixin, viewsets.ModelViewSet):
 
     def _update_user(self, request, **kwargs):
         partial = kwargs.pop("partial", False)
+        # Bad fieldsets are rejected before anything is written
+        fields = serializer_fields(
+            UserDetailedSerializer, self.requested_fields()
+        )
         instance = self.get_object()
         serializer = self.get_serializer(
             instance, data=request.data, partial=partial
@@ -75,7 +212,7 @@ class UserViewSet(PermissionsIsolatedMixin, viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         response_serialized = UserDetailedSerializer(
-            instance=serializer.instance
+            instance=serializer.instance, fields=fields
         )
         return Response(response_serialized.data, status.HTTP_200_OK)
 
@@ -85,8 +222,161 @@ class UserViewSet(PermissionsIsolatedMixin, viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
 
-        response_serialized = UserDetailedSerializer(
+        response_serialized = UserCreatedSerializer(
             instance=serializer.instance
         )
 
         return Response(response_serialized.data, status.HTTP_201_CREATED)
+
+    @permission_classes((IsAuthenticated,))
+    @action(detail=False, methods=["get"], url_path="multi")
+    def multi_retrieve(self, request):
+        """
+        Retrieve the users of `?ids=<id>,<id>,...` at once, in order,
+        reporting the ids that don't exist as missing
+        """
+        requested = self.requested_fields()
+        ids = list(
+            dict.fromkeys(request.query_params.get("ids", "").split(","))
+        )
+        ids = [value for value in ids if value]
+        max_ids = users_api_settings()["MULTI_GET_MAX_IDS"]
+        if not ids:
+            raise ValidationError({"ids": "A list of ids is required."})
+        if len(ids) > max_ids:
+            raise ValidationError({"ids": f"Up to {max_ids} ids are allowed."})
+
+        pks = {}
+        for value in ids:
+            try:
+                pks[value] = uuid.UUID(value)
+            except ValueError:
+                continue
+        if request.user.is_staff or request.user.pk in pks.values():
+            widest = UserDetailedSerializer
+        else:
+            widest = UserSerializer
+        queryset = project_users(
+            User.objects.filter(pk__in=pks.values()),
+            serializer_fields(widest, requested),
+        )
+        users = {user.pk: user for user in queryset}
+
+        results, missing = [], []
+        for value in ids:
+            user = users.get(pks.get(value))
+            if user is None:
+                missing.append(value)
+                continue
+            serializer_class = self.get_object_serializer_class(user.pk)
+            fields = serializer_fields(serializer_class, requested)
+            results.append(compiled_serializer(serializer_class, fields)(user))
+        return Response({"results": results, "missing": missing})
+
+    @permission_classes((IsStaff,))
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Search users by part of their username, names or email with
+        `?q=<text>&limit=<n>`, best matches first
+        """
+        fields = serializer_fields(
+            UserDetailedSerializer, self.requested_fields()
+        )
+        query = request.query_params.get("q", "").strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValidationError(
+                {"q": f"At least {MIN_QUERY_LENGTH} characters are required."}
+            )
+        max_limit = users_api_settings()["SEARCH_MAX_LIMIT"]
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), max_limit)
+        except ValueError as ex:
+            raise ValidationError({"limit": "Must be a number."}) from ex
+        if limit < 1:
+            raise ValidationError({"limit": "Must be positive."})
+
+        users = search_users(
+            query, limit, project_users(User.objects.all(), fields)
+        )
+        serialize = compiled_serializer(UserDetailedSerializer, fields)
+        return Response({"results": serialize.many(users)})
+
+    @permission_classes((IsStaff,))
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream every user, filtered like the list, as ndjson or csv with
+        `?output=ndjson|csv`
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in CONTENT_TYPES:
+            raise ValidationError({"output": "Must be ndjson or csv."})
+        queryset = self.filter_queryset(User.objects.all())
+        chunk_size = users_api_settings()["EXPORT_CHUNK_SIZE"]
+        response = StreamingHttpResponse(
+            export_users(output, queryset, chunk_size),
+            content_type=CONTENT_TYPES[output],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="users.{output}"'
+        return response
+
+    @permission_classes((IsStaff,))
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk_create(self, request):
+        """
+        Create a list of users, as json or ndjson, answering a result
+        per user: 201 when all were created, 207 when some failed
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError("A list of users is required")
+
+        max_items = users_api_settings()["BULK_CREATE_MAX_ITEMS"]
+        if len(items) > max_items:
+            raise ValidationError(f"Up to {max_items} users are allowed")
+
+        results = bulk_create_users(items)
+        created = sum(result["status"] == 201 for result in results)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(results, code)
+
+
+class SubscriptionEventsView(APIView):
+    """
+    Subscription change events api view, for the subscription service
+    to push batches of events as a json list or as ndjson
+    """
+
+    authentication_classes = ()
+    permission_classes = (HasWebhookSignature,)
+    parser_classes = (JSONParser, NDJSONParser)
+
+    def post(self, request):
+        """Apply a batch of events"""
+        events = request.data
+        if isinstance(events, dict):
+            events = events.get("events")
+        if not isinstance(events, list):
+            raise ValidationError("A list of events is required")
+
+        max_events = subscription_settings()["WEBHOOK_MAX_EVENTS"]
+        if len(events) > max_events:
+            raise ValidationError(f"Up to {max_events} events are allowed")
+
+        serializer = SubscriptionEventSerializer(data=events, many=True)
+        serializer.is_valid(raise_exception=True)
+        report = apply_subscription_events(serializer.validated_data)
+        return Response(report, status.HTTP_200_OK)